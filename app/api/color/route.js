@@ -0,0 +1,23 @@
+import { findNearestColors, normalizeHex } from "../../../lib/color-search.js";
+import { isAllowedOrigin } from "../../../lib/origin-allowlist.js";
+
+const DEFAULT_LIMIT = 5;
+const MAX_LIMIT = 20;
+
+export async function GET(request) {
+  if (!isAllowedOrigin(request)) {
+    return Response.json({ error: "Origin not allowed." }, { status: 403 });
+  }
+  const { searchParams } = new URL(request.url);
+  const hex = normalizeHex(searchParams.get("hex"));
+  if (!hex) {
+    return Response.json({ error: "Invalid color code." }, { status: 400 });
+  }
+
+  const rawLimit = Number(searchParams.get("limit"));
+  const limit = Number.isInteger(rawLimit) && rawLimit > 0
+    ? Math.min(rawLimit, MAX_LIMIT)
+    : DEFAULT_LIMIT;
+
+  return Response.json({ hex, results: findNearestColors(hex, limit) });
+}
@@ -1,6 +1,7 @@
 ﻿import { getBirthData, getEmbeddings } from "../../../lib/data.js";
 import { getClientIp, rateLimit } from "../../../lib/rate-limit.js";
 import { isAllowedOrigin } from "../../../lib/origin-allowlist.js";
+import { timeStage } from "../../../lib/stage-timer.js";
 import {
   EMBEDDING_MAX_SCORE,
   EMBEDDING_THRESHOLD,
@@ -70,7 +71,9 @@ export async function POST(request) {
   const embeddingsMap = getEmbeddings();
   let keywordEmbeddings = null;
   try {
-    keywordEmbeddings = await getKeywordEmbeddings(keywords, deadline);
+    keywordEmbeddings = await timeStage("embedding", () =>
+      getKeywordEmbeddings(keywords, deadline)
+    );
   } catch (error) {
     if (isTimeoutError(error)) {
       return Response.json({ error: "Search timed out." }, { status: 504 });
@@ -82,15 +85,17 @@ export async function POST(request) {
   if (keywordEmbeddings && embeddingsMap) {
     try {
       const allItems = collectAllItems(data);
-      semanticWeights = await getSemanticWeights({
-        items: allItems,
-        keywords,
-        keywordEmbeddings,
-        embeddingsMap,
-        embeddingThreshold: EMBEDDING_THRESHOLD,
-        perKeywordLimit: SEMANTIC_LIMIT_PER_KEYWORD,
-        deadline,
-      });
+      semanticWeights = await timeStage("semanticWeights", () =>
+        getSemanticWeights({
+          items: allItems,
+          keywords,
+          keywordEmbeddings,
+          embeddingsMap,
+          embeddingThreshold: EMBEDDING_THRESHOLD,
+          perKeywordLimit: SEMANTIC_LIMIT_PER_KEYWORD,
+          deadline,
+        })
+      );
     } catch (error) {
       if (isTimeoutError(error)) {
         return Response.json({ error: "Search timed out." }, { status: 504 });
@@ -102,15 +107,17 @@ export async function POST(request) {
   const semanticKeywordMap = buildSemanticKeywordMap(semanticWeights, keywords);
   const results = [];
   for (const [dateKey, dateData] of Object.entries(data.dates || {})) {
-    const scored = scoreDate({
-      dateKey,
-      dateData,
-      keywords,
-      keywordEmbeddings,
-      embeddingsMap,
-      embeddingThreshold: EMBEDDING_THRESHOLD,
-      semanticWeights,
-    });
+    const scored = timeStage("scoreDate", () =>
+      scoreDate({
+        dateKey,
+        dateData,
+        keywords,
+        keywordEmbeddings,
+        embeddingsMap,
+        embeddingThreshold: EMBEDDING_THRESHOLD,
+        semanticWeights,
+      })
+    );
 
     const matchIndex = buildItemMatchIndex({
       items: scored.items,
@@ -0,0 +1,80 @@
+import { getColorIndex } from "./data.js";
+
+const HEX_RE = /^#?([0-9a-fA-F]{6})$/;
+const D65_WHITE = [0.95047, 1.0, 1.08883];
+
+export function normalizeHex(value) {
+  const match = String(value || "").trim().match(HEX_RE);
+  if (!match) return "";
+  return `#${match[1].toUpperCase()}`;
+}
+
+export function hexToLab(value) {
+  const hex = normalizeHex(value);
+  if (!hex) return null;
+  const [r, g, b] = [1, 3, 5].map((offset) =>
+    srgbToLinear(parseInt(hex.slice(offset, offset + 2), 16))
+  );
+  const x = (0.4124 * r + 0.3576 * g + 0.1805 * b) / D65_WHITE[0];
+  const y = (0.2126 * r + 0.7152 * g + 0.0722 * b) / D65_WHITE[1];
+  const z = (0.0193 * r + 0.1192 * g + 0.9505 * b) / D65_WHITE[2];
+  const fx = labComponent(x);
+  const fy = labComponent(y);
+  const fz = labComponent(z);
+  return [116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)];
+}
+
+export function findNearestColors(value, limit = 5) {
+  const target = hexToLab(value);
+  const { items = [], tree = [] } = getColorIndex();
+  if (!target || tree.length === 0 || limit <= 0) return [];
+
+  // k-d tree over Lab built by scripts/color_index.py; node = [item, axis, left, right].
+  const best = [];
+  const visit = (nodeIndex) => {
+    if (nodeIndex < 0) return;
+    const [itemIndex, axis, left, right] = tree[nodeIndex];
+    const lab = items[itemIndex].lab;
+    const distance = squaredDistance(target, lab);
+    if (best.length < limit || distance < best[best.length - 1].distance) {
+      insertSorted(best, { itemIndex, distance }, limit);
+    }
+    const diff = target[axis] - lab[axis];
+    visit(diff < 0 ? left : right);
+    if (best.length < limit || diff * diff < best[best.length - 1].distance) {
+      visit(diff < 0 ? right : left);
+    }
+  };
+  visit(0);
+
+  return best.map(({ itemIndex, distance }) => ({
+    ...items[itemIndex],
+    deltaE: Math.round(Math.sqrt(distance) * 100) / 100,
+  }));
+}
+
+function insertSorted(list, entry, limit) {
+  let index = list.length;
+  while (index > 0 && list[index - 1].distance > entry.distance) {
+    index -= 1;
+  }
+  list.splice(index, 0, entry);
+  if (list.length > limit) list.pop();
+}
+
+function squaredDistance(a, b) {
+  const dl = a[0] - b[0];
+  const da = a[1] - b[1];
+  const db = a[2] - b[2];
+  return dl * dl + da * da + db * db;
+}
+
+function srgbToLinear(value) {
+  const channel = value / 255;
+  return channel <= 0.04045 ? channel / 12.92 : Math.pow((channel + 0.055) / 1.055, 2.4);
+}
+
+function labComponent(t) {
+  const delta = 6 / 29;
+  return t > delta ** 3 ? Math.cbrt(t) : t / (3 * delta * delta) + 4 / 29;
+}
@@ -1,13 +1,18 @@
-﻿import fs from "fs";
+﻿import crypto from "crypto";
+import fs from "fs";
 import path from "path";
 
 const dataPath = path.join(process.cwd(), "content", "birthdata.json");
 const embedPath = path.join(process.cwd(), "content", "embeddings.json");
 const metaPath = path.join(process.cwd(), "content", "meta.json");
+const colorIndexPath = path.join(process.cwd(), "content", "color-index.json");
+const compiledPath = path.join(process.cwd(), "content", "birthdata.compiled.json");
 
 let cachedData = null;
 let cachedEmbeddings = null;
 let cachedMeta = null;
+let cachedColorIndex = null;
+let cachedCompiled;
 
 function readJsonFile(filePath) {
   const raw = fs.readFileSync(filePath, "utf8").replace(/^\uFEFF/, "");
@@ -46,6 +51,30 @@ export function getMeta() {
   return cachedMeta;
 }
 
+export function getColorIndex() {
+  if (cachedColorIndex) return cachedColorIndex;
+  if (!fs.existsSync(colorIndexPath)) {
+    cachedColorIndex = { items: [], tree: [] };
+    return cachedColorIndex;
+  }
+  cachedColorIndex = readJsonFile(colorIndexPath);
+  return cachedColorIndex;
+}
+
+// Search items precomputed by scripts/compile-birthdata.py. Returns null when the
+// artifact is missing or was built from a different birthdata.json.
+export function getCompiledBirthData() {
+  if (cachedCompiled !== undefined) return cachedCompiled;
+  cachedCompiled = null;
+  if (!fs.existsSync(compiledPath)) return cachedCompiled;
+  const compiled = readJsonFile(compiledPath);
+  const sourceHash = crypto.createHash("sha256").update(fs.readFileSync(dataPath)).digest("hex");
+  if (compiled?.version === 1 && compiled.sourceHash === sourceHash && compiled.dates) {
+    cachedCompiled = compiled;
+  }
+  return cachedCompiled;
+}
+
 export function getCategoryKeys() {
   return getMeta().categories.map((category) => category.key);
 }
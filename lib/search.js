@@ -1,4 +1,4 @@
-﻿import { getCategoryKeys, normalizeText } from "./data.js";
+﻿import { getBirthData, getCategoryKeys, getCompiledBirthData, normalizeText } from "./data.js";
 import {
   COVERAGE_BONUS,
   EMBEDDING_MAX_SCORE,
@@ -9,6 +9,9 @@ import {
   SEMANTIC_SIMILARITY_MAX,
 } from "../content/app-config.js";
 
+// Bump whenever TOKEN_SPLIT_RE, STRIP_RE, normalizeForMatch or normalizeText change;
+// birthdata.compiled.json written for another version is ignored.
+export const NORMALIZATION_VERSION = 1;
 const TOKEN_SPLIT_RE = /[\s/・、,，／]+/g;
 const STRIP_RE = /[\s\u3000/・、,，／\.\-—–~〜!?！？:：;；"'“”‘’()（）\[\]【】{}「」『』]/g;
 const SEARCH_EXCLUDED_CATEGORIES = new Set(["stone_monthly"]);
@@ -27,6 +30,17 @@ function getCoverageMultiplier(matchedCount, totalKeywords) {
 
 export function buildDateItems(dateKey, dateData) {
   const categoryKeys = getCategoryKeys().filter((key) => !SEARCH_EXCLUDED_CATEGORIES.has(key));
+  const compiled = getCompiledBirthData();
+  if (
+    compiled &&
+    compiled.normalizationVersion === NORMALIZATION_VERSION &&
+    compiled.dates[dateKey] &&
+    dateData === getBirthData().dates?.[dateKey] &&
+    compiled.categories.join("|") === categoryKeys.join("|")
+  ) {
+    return compiled.dates[dateKey];
+  }
+
   const items = [];
 
   for (const category of categoryKeys) {
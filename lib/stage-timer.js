@@ -0,0 +1,26 @@
+// Optional per-stage timing for the search path. Nothing is measured unless an
+// observer is installed (scripts/bench-search-harness.mjs does this).
+let observer = null;
+
+export function setStageObserver(callback) {
+  observer = typeof callback === "function" ? callback : null;
+}
+
+export function timeStage(name, fn) {
+  if (!observer) return fn();
+  const report = observer;
+  const start = performance.now();
+  const done = () => report(name, performance.now() - start);
+  let result;
+  try {
+    result = fn();
+  } catch (error) {
+    done();
+    throw error;
+  }
+  if (result && typeof result.then === "function") {
+    return result.finally(done);
+  }
+  done();
+  return result;
+}
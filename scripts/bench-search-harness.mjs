@@ -0,0 +1,94 @@
+import fs from "fs";
+import { setStageObserver } from "../lib/stage-timer.js";
+
+// Driven by scripts/bench-search.py: runs a workload against the /api/search
+// handler in-process and writes raw timings. Run with the work directory as cwd
+// so lib/data.js picks up the benchmark's content/ files.
+const [workloadPath, outPath] = process.argv.slice(2);
+if (!workloadPath || !outPath) {
+  console.error("Usage: node bench-search-harness.mjs <workload.json> <out.json>");
+  process.exit(1);
+}
+
+const workload = JSON.parse(fs.readFileSync(workloadPath, "utf8"));
+const stubBase = process.env.BENCH_OPENAI_BASE;
+if (stubBase) {
+  const realFetch = globalThis.fetch;
+  globalThis.fetch = (url, options) =>
+    realFetch(String(url).replace("https://api.openai.com", stubBase), options);
+}
+
+const { POST } = await import("../app/api/search/route.js");
+
+let stages = null;
+setStageObserver((name, ms) => {
+  if (!stages) return;
+  const entry = stages[name] || (stages[name] = { ms: 0, calls: 0 });
+  entry.ms += ms;
+  entry.calls += 1;
+});
+
+async function runQuery(query, index) {
+  const request = new Request("http://localhost:3000/api/search", {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Origin: "http://localhost:3000",
+      // A fresh client per request keeps the rate limiter out of the numbers.
+      "x-forwarded-for": `bench-${index}`,
+    },
+    body: JSON.stringify({ keywords: query.keywords, limit: workload.limit }),
+  });
+  stages = {};
+  const start = performance.now();
+  const response = await POST(request);
+  const payload = await response.json();
+  const totalMs = performance.now() - start;
+  const sample = {
+    kind: query.kind,
+    keywords: query.keywords,
+    status: response.status,
+    results: payload.total ?? 0,
+    totalMs,
+    stages,
+    heapUsed: process.memoryUsage().heapUsed,
+  };
+  stages = null;
+  return sample;
+}
+
+function collectGarbage() {
+  if (typeof globalThis.gc === "function") globalThis.gc();
+}
+
+const queries = workload.queries || [];
+const warmup = Math.min(workload.warmup || 0, queries.length);
+for (let index = 0; index < warmup; index += 1) {
+  await runQuery(queries[index], `warmup-${index}`);
+}
+collectGarbage();
+const baseline = process.memoryUsage();
+
+const samples = [];
+let peakRss = baseline.rss;
+for (let index = 0; index < queries.length; index += 1) {
+  samples.push(await runQuery(queries[index], index));
+  peakRss = Math.max(peakRss, process.memoryUsage().rss);
+}
+collectGarbage();
+const end = process.memoryUsage();
+
+fs.writeFileSync(
+  outPath,
+  JSON.stringify({
+    node: process.version,
+    memory: {
+      baselineRss: baseline.rss,
+      baselineHeapUsed: baseline.heapUsed,
+      endRss: end.rss,
+      endHeapUsed: end.heapUsed,
+      peakRss,
+    },
+    samples,
+  })
+);
@@ -0,0 +1,400 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import shutil
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from birthdata_compiler import collect_tokens, compiled_path_for, normalize_for_match
+
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_PATH = ROOT / "content" / "birthdata.json"
+META_PATH = ROOT / "content" / "meta.json"
+CONFIG_PATH = ROOT / "content" / "app-config.js"
+HARNESS_PATH = Path(__file__).resolve().parent / "bench-search-harness.mjs"
+WORK_DIR = ROOT / ".cache" / "bench-search"
+
+CONFIG_RE = re.compile(r"export const (\w+) = ([0-9_]+);")
+SEMANTIC_ROW_RE = re.compile(r"^- ([^:]+): ", re.M)
+KEYWORD_LINE_RE = re.compile(r"^キーワード: (.*)$", re.M)
+MISS_CHARS = "ゐゑヰヱヮゎヵヶ"
+KINDS = ("exact", "mixed", "miss", "long")
+STAGES = ("embedding", "semanticWeights", "scoreDate")
+
+
+def read_config():
+    text = CONFIG_PATH.read_text(encoding="utf-8-sig")
+    return {name: int(value.replace("_", "")) for name, value in CONFIG_RE.findall(text)}
+
+
+class TextEmbedder:
+    """Deterministic stand-in embeddings: a normalized sum of per-bigram random vectors.
+
+    Texts that share characters get similar vectors, so the semantic stage sees a
+    realistic mix of candidates above and below EMBEDDING_THRESHOLD.
+    """
+
+    def __init__(self, dim):
+        self.dim = dim
+        self.grams = {}
+        self.lock = threading.Lock()
+
+    def gram_vector(self, gram):
+        with self.lock:
+            vector = self.grams.get(gram)
+            if vector is None:
+                digest = hashlib.sha256(gram.encode("utf-8")).digest()
+                rng = random.Random(int.from_bytes(digest[:8], "big"))
+                vector = [rng.gauss(0, 1) for _ in range(self.dim)]
+                self.grams[gram] = vector
+            return vector
+
+    def embed(self, text):
+        compact = normalize_for_match(text)
+        grams = [compact[i : i + 2] for i in range(len(compact) - 1)] or [compact]
+        total = [0.0] * self.dim
+        for gram in grams:
+            total = [a + b for a, b in zip(total, self.gram_vector(gram))]
+        norm = math.sqrt(sum(value * value for value in total)) or 1.0
+        return [round(value / norm, 5) for value in total]
+
+
+def meaning_list(item):
+    return [str(text).strip() for text in item.get("meaning") or [] if str(text).strip()]
+
+
+def write_embeddings(data, category_keys, embedder, path):
+    # Same ids and texts as scripts/generate-embeddings.mjs.
+    items = {}
+    phrases = {}
+    for date_key, date_data in data["dates"].items():
+        for category in category_keys:
+            for index, item in enumerate(date_data.get(category) or []):
+                meanings = meaning_list(item)
+                if not meanings:
+                    continue
+                item_id = f"{date_key}|{category}|{index}"
+                items[item_id] = embedder.embed(" ".join(meanings))
+                for meaning_index, text in enumerate(meanings):
+                    phrases[f"{item_id}|m{meaning_index}"] = embedder.embed(text)
+    path.write_text(json.dumps({"items": items, "phrases": phrases}), encoding="utf-8")
+
+
+def prepare_work_dir(work_dir, dim, use_compiled):
+    content_dir = work_dir / "content"
+    content_dir.mkdir(parents=True, exist_ok=True)
+    for name in ("birthdata.json", "meta.json"):
+        shutil.copyfile(ROOT / "content" / name, content_dir / name)
+    compiled = compiled_path_for(DATA_PATH)
+    target = content_dir / compiled.name
+    if use_compiled and compiled.exists():
+        shutil.copyfile(compiled, target)
+    elif target.exists():
+        target.unlink()
+
+    data = json.loads(DATA_PATH.read_text(encoding="utf-8-sig"))
+    meta = json.loads(META_PATH.read_text(encoding="utf-8-sig"))
+    category_keys = [item["key"] for item in meta.get("categories", [])]
+    embedder = TextEmbedder(dim)
+
+    # Embeddings only depend on the data and the dimension, so reuse them across runs.
+    source_hash = hashlib.sha256(DATA_PATH.read_bytes()).hexdigest()
+    stamp = content_dir / "embeddings.stamp"
+    embed_path = content_dir / "embeddings.json"
+    expected = f"{source_hash}:{dim}"
+    if not embed_path.exists() or not stamp.exists() or stamp.read_text() != expected:
+        print(f"Generating stand-in embeddings (dim={dim})...", flush=True)
+        write_embeddings(data, category_keys, embedder, embed_path)
+        stamp.write_text(expected)
+    return data, category_keys, embedder
+
+
+def build_workload(data, category_keys, config, per_kind, seed, recorded):
+    rng = random.Random(seed)
+    max_keywords = config["MAX_KEYWORDS"]
+    max_chars = config["MAX_KEYWORD_CHARS"]
+
+    vocabulary = set()
+    meanings = []
+    for date_data in data["dates"].values():
+        for category in category_keys:
+            for item in date_data.get(category) or []:
+                values = [item["name"], *meaning_list(item)]
+                meanings.extend(meaning_list(item))
+                for token in collect_tokens(values):
+                    if len(token["compact"]) >= config.get("MIN_TOKEN_LENGTH", 2):
+                        vocabulary.add(token["text"])
+    vocabulary = sorted(vocabulary)
+    corpus = "\n".join(normalize_for_match(text) for text in vocabulary + meanings)
+
+    def miss_word():
+        while True:
+            word = "".join(rng.choice(MISS_CHARS) for _ in range(rng.randint(3, 5)))
+            if normalize_for_match(word) not in corpus:
+                return word
+
+    def fit(words):
+        # The route rejects requests whose keywords add up to more than MAX_KEYWORD_CHARS.
+        kept = []
+        for word in words:
+            if sum(map(len, kept)) + len(word) <= max_chars:
+                kept.append(word)
+        return kept or [words[0][:max_chars]]
+
+    queries = []
+    for index in range(per_kind):
+        count = index % max_keywords + 1
+        queries.append({"kind": "exact", "keywords": fit(rng.sample(vocabulary, count))})
+        words = [rng.choice(vocabulary) if rng.random() < 0.5 else miss_word() for _ in range(count)]
+        queries.append({"kind": "mixed", "keywords": fit(words)})
+        queries.append({"kind": "miss", "keywords": fit([miss_word() for _ in range(count)])})
+        text = ""
+        while len(text) < max_chars:
+            text += rng.choice(meanings)
+        queries.append({"kind": "long", "keywords": [text[:max_chars]]})
+    for keywords in recorded:
+        queries.append({"kind": "recorded", "keywords": fit(keywords)})
+    return queries
+
+
+def load_recorded(path):
+    if not path:
+        return []
+    queries = []
+    for line in Path(path).read_text(encoding="utf-8-sig").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("["):
+            keywords = [str(value).strip() for value in json.loads(line)]
+        else:
+            keywords = line.split()
+        keywords = [value for value in keywords if value]
+        if keywords:
+            queries.append(keywords)
+    return queries
+
+
+class OpenAIStub:
+    def __init__(self, embedder, embed_latency_ms, chat_latency_ms):
+        self.embedder = embedder
+        self.embed_latency = embed_latency_ms / 1000
+        self.chat_latency = chat_latency_ms / 1000
+        self.lock = threading.Lock()
+        self.stats = {"embeddings": 0, "chat": 0, "candidates": 0}
+
+    def add_stat(self, key, value=1):
+        with self.lock:
+            self.stats[key] += value
+
+    def embeddings(self, payload):
+        time.sleep(self.embed_latency)
+        self.add_stat("embeddings")
+        inputs = payload.get("input") or []
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        return {
+            "data": [
+                {"index": index, "embedding": self.embedder.embed(text)}
+                for index, text in enumerate(inputs)
+            ]
+        }
+
+    def chat(self, payload):
+        time.sleep(self.chat_latency)
+        self.add_stat("chat")
+        user = payload["messages"][-1]["content"]
+        keyword_match = KEYWORD_LINE_RE.search(user)
+        keyword = keyword_match.group(1) if keyword_match else ""
+        weights = []
+        for item_id in SEMANTIC_ROW_RE.findall(user):
+            digest = hashlib.sha256(f"{keyword}:{item_id}".encode("utf-8")).digest()
+            weights.append({"id": item_id, "weight": round(0.4 + 1.1 * digest[0] / 255, 2)})
+        self.add_stat("candidates", len(weights))
+        content = json.dumps({"weights": weights}, ensure_ascii=False)
+        return {"choices": [{"message": {"role": "assistant", "content": content}}]}
+
+
+def make_handler(stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if self.path == "/v1/embeddings":
+                result = stub.embeddings(payload)
+            elif self.path == "/v1/chat/completions":
+                result = stub.chat(payload)
+            else:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = json.dumps(result, ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def describe(values):
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0,
+    }
+
+
+def summarize(raw, config):
+    samples = raw["samples"]
+    kinds = sorted({sample["kind"] for sample in samples}, key=lambda kind: (kind not in KINDS, kind))
+    summary = {
+        "node": raw["node"],
+        "config": config,
+        "statuses": {},
+        "latency": {"all": describe([sample["totalMs"] for sample in samples])},
+        "stages": {},
+        "memory": {key: round(value / 1024 / 1024, 1) for key, value in raw["memory"].items()},
+    }
+    for sample in samples:
+        status = str(sample["status"])
+        summary["statuses"][status] = summary["statuses"].get(status, 0) + 1
+    for kind in kinds:
+        summary["latency"][kind] = describe(
+            [sample["totalMs"] for sample in samples if sample["kind"] == kind]
+        )
+    for stage in STAGES:
+        summary["stages"][stage] = describe(
+            [sample["stages"][stage]["ms"] for sample in samples if stage in sample["stages"]]
+        )
+    score_calls = [sample["stages"]["scoreDate"] for sample in samples if "scoreDate" in sample["stages"]]
+    if score_calls:
+        summary["stages"]["scoreDate"]["perDateMean"] = sum(
+            entry["ms"] for entry in score_calls
+        ) / sum(entry["calls"] for entry in score_calls)
+    return summary
+
+
+def print_summary(summary, baseline=None):
+    def row(label, stats, base=None):
+        line = (
+            f"  {label:<16} n={stats['count']:<5} p50 {stats['p50']:8.2f}  "
+            f"p95 {stats['p95']:8.2f}  p99 {stats['p99']:8.2f}  max {stats['max']:8.2f} ms"
+        )
+        if base and base.get("p50"):
+            line += f"  (p50 {100 * (stats['p50'] / base['p50'] - 1):+.0f}% vs baseline)"
+        print(line)
+
+    base_latency = (baseline or {}).get("latency", {})
+    base_stages = (baseline or {}).get("stages", {})
+    print(f"Node {summary['node']}, statuses {summary['statuses']}")
+    print("Latency per request:")
+    for label, stats in summary["latency"].items():
+        row(label, stats, base_latency.get(label))
+    print("Time per request by stage:")
+    for label, stats in summary["stages"].items():
+        if stats["count"]:
+            row(label, stats, base_stages.get(label))
+    per_date = summary["stages"]["scoreDate"].get("perDateMean")
+    if per_date is not None:
+        print(f"  scoreDate mean per date: {per_date * 1000:.1f} us")
+    memory = summary["memory"]
+    print(
+        f"Memory (MB): heap {memory['baselineHeapUsed']} -> {memory['endHeapUsed']} after GC, "
+        f"rss {memory['baselineRss']} -> peak {memory['peakRss']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the /api/search handler against a local OpenAI stand-in."
+    )
+    parser.add_argument("--per-kind", type=int, default=30, help="Queries per workload kind.")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--seed", default="0")
+    parser.add_argument("--queries", help="Recorded queries: one per line, space-separated or a JSON array.")
+    parser.add_argument("--dim", type=int, default=256, help="Stand-in embedding size.")
+    parser.add_argument("--embed-latency-ms", type=float, default=0)
+    parser.add_argument("--chat-latency-ms", type=float, default=0)
+    parser.add_argument(
+        "--no-compiled",
+        action="store_true",
+        help="Benchmark without content/birthdata.compiled.json.",
+    )
+    parser.add_argument("--work-dir", type=Path, default=WORK_DIR)
+    parser.add_argument("--json", type=Path, help="Save the summary as JSON.")
+    parser.add_argument("--baseline", type=Path, help="Summary JSON from an earlier run to compare with.")
+    args = parser.parse_args()
+
+    config = read_config()
+    data, category_keys, embedder = prepare_work_dir(args.work_dir, args.dim, not args.no_compiled)
+    queries = build_workload(
+        data, category_keys, config, args.per_kind, args.seed, load_recorded(args.queries)
+    )
+    workload_path = args.work_dir / "workload.json"
+    raw_path = args.work_dir / "raw.json"
+    workload_path.write_text(
+        json.dumps(
+            {"limit": config.get("RESULT_LIMIT"), "warmup": args.warmup, "queries": queries},
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+
+    stub = OpenAIStub(embedder, args.embed_latency_ms, args.chat_latency_ms)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(stub))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "bench",
+        "BENCH_OPENAI_BASE": f"http://127.0.0.1:{server.server_port}",
+    }
+    print(f"Running {len(queries)} queries ({args.warmup} warm-up)...", flush=True)
+    try:
+        subprocess.run(
+            ["node", "--expose-gc", str(HARNESS_PATH), str(workload_path), str(raw_path)],
+            cwd=args.work_dir,
+            env=env,
+            check=True,
+        )
+    finally:
+        server.shutdown()
+
+    raw = json.loads(raw_path.read_text(encoding="utf-8"))
+    summary = summarize(raw, {"dim": args.dim, "compiled": not args.no_compiled, **config})
+    summary["stub"] = stub.stats
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else None
+    print_summary(summary, baseline)
+    if args.json:
+        args.json.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+        print("Saved", args.json)
+
+
+if __name__ == "__main__":
+    main()
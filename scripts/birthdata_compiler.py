@@ -0,0 +1,199 @@
+import hashlib
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+
+DAYS_IN_MONTH = [31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+# Keep in sync with SEARCH_EXCLUDED_CATEGORIES in lib/search.js.
+SEARCH_EXCLUDED_CATEGORIES = {"stone_monthly"}
+
+ITEM_FIELDS = {
+    "name": {"type": str, "required": True},
+    "meaning": {"type": list, "required": True},
+    "source": {"type": str, "required": True},
+    "colorCode": {"type": str, "required": False},
+}
+COLOR_CODE_RE = re.compile(r"^#[0-9A-Fa-f]{6}$")
+
+# Keep in sync with NORMALIZATION_VERSION in lib/search.js; bump it with any change below.
+NORMALIZATION_VERSION = 1
+# JavaScript's \s, so the derived fields match lib/search.js exactly.
+JS_SPACE = "\\t\\n\\v\\f\\r \\u00a0\\u1680\\u2000-\\u200a\\u2028\\u2029\\u202f\\u205f\\u3000\\ufeff"
+TOKEN_SPLIT_RE = re.compile(f"[{JS_SPACE}/・、,，／]+")
+STRIP_RE = re.compile(
+    f"[{JS_SPACE}\\u3000/・、,，／.\\-—–~〜!?！？:：;；\"'“”‘’()（）\\[\\]【】{{}}「」『』]"
+)
+
+
+class BirthdataError(ValueError):
+    pass
+
+
+def expected_date_keys():
+    return [
+        f"{month:02d}-{day:02d}"
+        for month in range(1, 13)
+        for day in range(1, DAYS_IN_MONTH[month - 1] + 1)
+    ]
+
+
+def validate_item(item, where, errors):
+    if not isinstance(item, dict):
+        errors.append(f"{where}: item must be an object")
+        return
+    for key in item:
+        if key not in ITEM_FIELDS:
+            errors.append(f"{where}: unknown field '{key}'")
+    for key, rule in ITEM_FIELDS.items():
+        if key not in item:
+            if rule["required"]:
+                errors.append(f"{where}: missing '{key}'")
+            continue
+        if not isinstance(item[key], rule["type"]):
+            errors.append(f"{where}: '{key}' must be {rule['type'].__name__}")
+    name = item.get("name")
+    if isinstance(name, str) and not name.strip():
+        errors.append(f"{where}: 'name' is empty")
+    meaning = item.get("meaning")
+    if isinstance(meaning, list):
+        for index, value in enumerate(meaning):
+            if not isinstance(value, str):
+                errors.append(f"{where}: meaning[{index}] must be str")
+    color_code = item.get("colorCode")
+    if isinstance(color_code, str) and not COLOR_CODE_RE.match(color_code):
+        errors.append(f"{where}: invalid colorCode '{color_code}'")
+
+
+def validate_birthdata(data, category_keys):
+    """Raise BirthdataError listing every problem found in a birthdata payload."""
+    errors = []
+    if not isinstance(data, dict):
+        raise BirthdataError("birthdata must be an object")
+    if not isinstance(data.get("meta"), dict):
+        errors.append("meta: must be an object")
+    dates = data.get("dates")
+    if not isinstance(dates, dict):
+        raise BirthdataError("dates: must be an object")
+
+    expected = expected_date_keys()
+    for date_key in expected:
+        if date_key not in dates:
+            errors.append(f"dates: missing {date_key}")
+    for date_key in dates:
+        if date_key not in expected:
+            errors.append(f"dates: unexpected key {date_key}")
+
+    for date_key, date_data in dates.items():
+        if not isinstance(date_data, dict):
+            errors.append(f"{date_key}: must be an object")
+            continue
+        for category in category_keys:
+            if not isinstance(date_data.get(category), list):
+                errors.append(f"{date_key}.{category}: must be a list")
+        for category, items in date_data.items():
+            if category not in category_keys:
+                errors.append(f"{date_key}.{category}: unknown category")
+                continue
+            if not isinstance(items, list):
+                continue
+            for index, item in enumerate(items):
+                validate_item(item, f"{date_key}.{category}[{index}]", errors)
+
+    if errors:
+        shown = "\n".join(f"- {error}" for error in errors[:50])
+        more = f"\n... and {len(errors) - 50} more" if len(errors) > 50 else ""
+        raise BirthdataError(f"birthdata has {len(errors)} problem(s):\n{shown}{more}")
+
+
+def normalize_text(value):
+    return str(value or "").lower()
+
+
+def normalize_for_match(value):
+    return STRIP_RE.sub("", unicodedata.normalize("NFKC", str(value or "")).lower())
+
+
+def js_trim(value):
+    return re.sub(f"^[{JS_SPACE}]+|[{JS_SPACE}]+$", "", value)
+
+
+def collect_tokens(values):
+    tokens = []
+    for value in values:
+        text = js_trim(str(value or ""))
+        if not text:
+            continue
+        for token in TOKEN_SPLIT_RE.split(text):
+            cleaned = js_trim(token)
+            if not cleaned:
+                continue
+            tokens.append(
+                {
+                    "text": cleaned,
+                    "normalized": normalize_text(cleaned),
+                    "compact": normalize_for_match(cleaned),
+                }
+            )
+    return tokens
+
+
+def compile_date_items(date_key, date_data, category_keys):
+    items = []
+    for category in category_keys:
+        if category in SEARCH_EXCLUDED_CATEGORIES:
+            continue
+        for index, item in enumerate(date_data.get(category) or []):
+            meaning = item["meaning"]
+            values = [item["name"], *meaning]
+            joined = " ".join(values)
+            items.append(
+                {
+                    "id": f"{date_key}|{category}|{index}",
+                    "index": index,
+                    "category": category,
+                    "name": item["name"],
+                    "meaning": meaning,
+                    "source": item.get("source") or "",
+                    "searchText": normalize_text(joined),
+                    "searchCompact": normalize_for_match(joined),
+                    "tokens": collect_tokens(values),
+                }
+            )
+    return items
+
+
+def compiled_path_for(data_path):
+    data_path = Path(data_path)
+    return data_path.with_name(f"{data_path.stem}.compiled.json")
+
+
+def load_category_keys(meta_path):
+    meta = json.loads(Path(meta_path).read_text(encoding="utf-8-sig"))
+    return [item["key"] for item in meta.get("categories", [])]
+
+
+def compile_birthdata(data_path, meta_path):
+    """Validate data_path and write the search artifact next to it."""
+    data_path = Path(data_path)
+    raw = data_path.read_bytes()
+    data = json.loads(raw.decode("utf-8-sig"))
+    category_keys = load_category_keys(meta_path)
+    validate_birthdata(data, category_keys)
+
+    compiled = {
+        "version": 1,
+        "normalizationVersion": NORMALIZATION_VERSION,
+        "sourceHash": hashlib.sha256(raw).hexdigest(),
+        "categories": [key for key in category_keys if key not in SEARCH_EXCLUDED_CATEGORIES],
+        "dates": {
+            date_key: compile_date_items(date_key, date_data, category_keys)
+            for date_key, date_data in data["dates"].items()
+        },
+    }
+    out_path = compiled_path_for(data_path)
+    out_path.write_text(
+        json.dumps(compiled, ensure_ascii=False, separators=(",", ":")), encoding="utf-8"
+    )
+    return out_path
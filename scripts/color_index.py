@@ -0,0 +1,157 @@
+import json
+import re
+from pathlib import Path
+
+
+HEX_RE = re.compile(r"^#?([0-9A-Fa-f]{6})$")
+
+# A subset of the JIS common color names, used for the nearest-name label.
+NAMED_COLORS = [
+    ("白", "#FFFFFF"),
+    ("生成り色", "#FBFAF5"),
+    ("銀色", "#AFAFB0"),
+    ("灰色", "#7D7D7D"),
+    ("黒", "#2B2B2B"),
+    ("赤", "#BE0032"),
+    ("紅色", "#BE003F"),
+    ("朱色", "#EF454A"),
+    ("桜色", "#FEF4F4"),
+    ("桃色", "#F09199"),
+    ("橙", "#EE7800"),
+    ("ベージュ", "#EEDCB3"),
+    ("茶色", "#965042"),
+    ("焦茶", "#6F4B3E"),
+    ("山吹色", "#F8B500"),
+    ("金色", "#E6B422"),
+    ("黄色", "#FFD900"),
+    ("黄緑", "#B8D200"),
+    ("若草色", "#C3D825"),
+    ("緑", "#00A95F"),
+    ("深緑", "#005243"),
+    ("青緑", "#00A497"),
+    ("水色", "#BCE2E8"),
+    ("空色", "#A0D8EF"),
+    ("青", "#0095D9"),
+    ("藍色", "#165E83"),
+    ("紺色", "#223A70"),
+    ("藤色", "#BBBCDE"),
+    ("紫", "#884898"),
+    ("えんじ色", "#B94047"),
+]
+
+# sRGB 8-bit channel -> linear RGB, computed once for all items.
+SRGB_TO_LINEAR = [
+    value / 255 / 12.92
+    if value / 255 <= 0.04045
+    else ((value / 255 + 0.055) / 1.055) ** 2.4
+    for value in range(256)
+]
+D65_WHITE = (0.95047, 1.0, 1.08883)
+
+
+def hex_to_rgb(code):
+    match = HEX_RE.match(str(code or "").strip())
+    if not match:
+        return None
+    value = match.group(1)
+    return tuple(int(value[i : i + 2], 16) for i in (0, 2, 4))
+
+
+def lab_component(t):
+    if t > (6 / 29) ** 3:
+        return t ** (1 / 3)
+    return t / (3 * (6 / 29) ** 2) + 4 / 29
+
+
+def rgb_to_lab(rgb):
+    r, g, b = (SRGB_TO_LINEAR[value] for value in rgb)
+    x = (0.4124 * r + 0.3576 * g + 0.1805 * b) / D65_WHITE[0]
+    y = (0.2126 * r + 0.7152 * g + 0.0722 * b) / D65_WHITE[1]
+    z = (0.0193 * r + 0.1192 * g + 0.9505 * b) / D65_WHITE[2]
+    fx, fy, fz = lab_component(x), lab_component(y), lab_component(z)
+    return (116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz))
+
+
+def text_color_for(rgb):
+    r, g, b = (SRGB_TO_LINEAR[value] for value in rgb)
+    luminance = 0.2126 * r + 0.7152 * g + 0.0722 * b
+    # WCAG contrast ratio against black vs. white text
+    on_black = (luminance + 0.05) / 0.05
+    on_white = 1.05 / (luminance + 0.05)
+    return "#000000" if on_black >= on_white else "#FFFFFF"
+
+
+def squared_distance(a, b):
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
+
+def build_kd_tree(points):
+    # Flat pre-order nodes: [point index, axis, left node, right node] (-1 = none)
+    nodes = []
+
+    def build(indices, depth):
+        if not indices:
+            return -1
+        axis = depth % 3
+        indices.sort(key=lambda i: (points[i][axis], i))
+        middle = len(indices) // 2
+        node_index = len(nodes)
+        nodes.append([indices[middle], axis, -1, -1])
+        nodes[node_index][2] = build(indices[:middle], depth + 1)
+        nodes[node_index][3] = build(indices[middle + 1 :], depth + 1)
+        return node_index
+
+    build(list(range(len(points))), 0)
+    return nodes
+
+
+def build_color_index(data):
+    named_labs = [
+        (name, rgb_to_lab(hex_to_rgb(code))) for name, code in NAMED_COLORS
+    ]
+    derived = {}
+    items = []
+    for date_key, date_data in sorted(data.get("dates", {}).items()):
+        colors = date_data.get("color")
+        if not isinstance(colors, list):
+            continue
+        for index, item in enumerate(colors):
+            if not isinstance(item, dict):
+                continue
+            rgb = hex_to_rgb(item.get("colorCode"))
+            if rgb is None:
+                continue
+            code = "#" + "".join(f"{value:02X}" for value in rgb)
+            if code not in derived:
+                lab = rgb_to_lab(rgb)
+                nearest = min(named_labs, key=lambda named: squared_distance(lab, named[1]))
+                derived[code] = {
+                    "lab": [round(value, 3) for value in lab],
+                    "textColor": text_color_for(rgb),
+                    "colorName": nearest[0],
+                }
+            items.append(
+                {
+                    "id": f"{date_key}|color|{index}",
+                    "date": date_key,
+                    "name": item.get("name", ""),
+                    "colorCode": code,
+                    **derived[code],
+                }
+            )
+    tree = build_kd_tree([item["lab"] for item in items])
+    return {"version": 1, "items": items, "tree": tree}
+
+
+def color_index_path_for(data_path):
+    return Path(data_path).with_name("color-index.json")
+
+
+def write_color_index(data, path):
+    """Write the nearest-color index used by /api/color; returns the item count."""
+    index = build_color_index(data)
+    Path(path).write_text(
+        json.dumps(index, ensure_ascii=False, separators=(",", ":")),
+        encoding="utf-8",
+    )
+    return len(index["items"])
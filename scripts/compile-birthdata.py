@@ -0,0 +1,27 @@
+import argparse
+from pathlib import Path
+
+from birthdata_compiler import BirthdataError, compile_birthdata
+
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_PATH = ROOT / "content" / "birthdata.json"
+META_PATH = ROOT / "content" / "meta.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Validate birthdata.json and write the precomputed search artifact next to it."
+    )
+    parser.add_argument("--data", type=Path, default=DATA_PATH)
+    parser.add_argument("--meta", type=Path, default=META_PATH)
+    args = parser.parse_args()
+    try:
+        out_path = compile_birthdata(args.data, args.meta)
+    except BirthdataError as error:
+        raise SystemExit(str(error))
+    print("Saved", out_path)
+
+
+if __name__ == "__main__":
+    main()
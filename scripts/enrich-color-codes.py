@@ -1,12 +1,27 @@
+import argparse
 import json
 import re
 import time
+import urllib.parse
 import urllib.request
 from pathlib import Path
 
+from birthdata_compiler import compile_birthdata, load_category_keys, validate_birthdata
+from color_index import write_color_index
+from page_stream import read_until
+from run_report import RunReport, add_report_args, run_with_report
+
 
 ROOT = Path(__file__).resolve().parents[1]
 DATA_PATH = ROOT / "content" / "birthdata.json"
+META_PATH = ROOT / "content" / "meta.json"
+COLOR_INDEX_PATH = ROOT / "content" / "color-index.json"
+
+REPORT = RunReport("enrich-color-codes")
+
+COLOR_CODE_RE = re.compile(
+    r"<th[^>]*>\s*カラーコード\s*</th>\s*<td[^>]*>(#[0-9A-Fa-f]{6})"
+)
 
 
 def fetch(url, timeout=30):
@@ -17,15 +32,18 @@ def fetch(url, timeout=30):
             "Accept": "text/html",
         },
     )
-    with urllib.request.urlopen(req, timeout=timeout) as resp:
-        return resp.read().decode("utf-8", errors="ignore")
+    host = urllib.parse.urlsplit(url).netloc
+    REPORT.count_host(host, "requests")
+    with REPORT.span("fetch"):
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            # Stop once the color code row has arrived; the rest of the page is unused.
+            received, text = read_until(resp, COLOR_CODE_RE, REPORT, host)
+    REPORT.count_host(host, "bytes", received)
+    return text
 
 
 def parse_color_code(html):
-    match = re.search(
-        r"<th[^>]*>\s*カラーコード\s*</th>\s*<td[^>]*>(#[0-9A-Fa-f]{6})",
-        html,
-    )
+    match = COLOR_CODE_RE.search(html)
     if match:
         return match.group(1).strip()
     match = re.search(r"background:\s*(#[0-9A-Fa-f]{6})", html)
@@ -34,7 +52,13 @@ def parse_color_code(html):
     return ""
 
 
-def main():
+def save_color_index(data):
+    with REPORT.span("index"):
+        count = write_color_index(data, COLOR_INDEX_PATH)
+    print(f"Saved color index for {count} items.")
+
+
+def enrich():
     data = json.loads(DATA_PATH.read_text(encoding="utf-8"))
     dates = data.get("dates", {})
     cache = {}
@@ -53,9 +77,12 @@ def main():
             continue
         if source in cache:
             code = cache[source]
+            REPORT.count_host(urllib.parse.urlsplit(source).netloc, "cache_hits")
         else:
             html = fetch(source)
-            code = parse_color_code(html)
+            with REPORT.span("parse", category="color"):
+                code = parse_color_code(html)
+            REPORT.record_parse("color", source, 1 if code else 0)
             cache[source] = code
             time.sleep(0.2)
         if not code:
@@ -65,10 +92,30 @@ def main():
                 item["colorCode"] = code
                 updated += 1
 
-    DATA_PATH.write_text(
-        json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    validate_birthdata(data, load_category_keys(META_PATH))
+    with REPORT.span("write"):
+        DATA_PATH.write_text(
+            json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        compile_birthdata(DATA_PATH, META_PATH)
     print(f"Updated color codes for {updated} items.")
+    save_color_index(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill in colorCode for color items.")
+    parser.add_argument(
+        "--index-only",
+        action="store_true",
+        help="Skip fetching and only rebuild content/color-index.json.",
+    )
+    add_report_args(parser)
+    args = parser.parse_args()
+    if args.index_only:
+        data = json.loads(DATA_PATH.read_text(encoding="utf-8"))
+        run_with_report(REPORT, args, lambda: save_color_index(data))
+    else:
+        run_with_report(REPORT, args, enrich)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,25 @@
-﻿import json
+﻿import argparse
+import gzip
+import hashlib
+import json
+import os
 import re
 import html as html_lib
+import shutil
 import time
+import urllib.error
+import urllib.parse
 import urllib.request
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
+from itertools import repeat
 from pathlib import Path
 
+from birthdata_compiler import compile_birthdata, load_category_keys, validate_birthdata
+from color_index import color_index_path_for, write_color_index
+from page_stream import read_until
+from run_report import RunReport, add_report_args, run_with_report
+
 BASE_OIWAI = "https://www.oiwai-item.com"
 ANDPLANTS_BASE = "https://andplants.jp"
 ANDPLANTS_INDEX = (
@@ -46,26 +60,121 @@ DAYS_IN_MONTH = [31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
 ROOT = Path(__file__).resolve().parents[1]
 META_PATH = ROOT / "content" / "meta.json"
 OUT_PATH = ROOT / "content" / "birthdata.json"
+STATE_PATH = ROOT / ".cache" / "refresh-state.json"
+STORE_DIR = ROOT / ".cache" / "page-store"
 
+RETRY_STATUSES = (429, 503)
+MAX_RETRIES = 3
+MAX_RETRY_DELAY = 10
+
+# The parsers only look at these parts of a page, so fetch_page() can stop
+# reading (via read_until) as soon as they have arrived.
+OIWAI_TABLE_RE = re.compile(r"<table class=\"detail\"[\s\S]*?</table>")
+FIRST_TABLE_RE = re.compile(r"<table[\s\S]*?</table>")
+COLOR_CODE_RE = re.compile(
+    r"<th[^>]*>\s*カラーコード\s*</th>\s*<td[^>]*>(#[0-9A-Fa-f]{6})"
+)
+
+# Set from the command line in main().
+ORIGIN_OVERRIDE = ""
+RECORD_DIR = None
+DELAY_SCALE = 1.0
+STREAM_FETCH = True
+REFRESH_MIN_INTERVAL = 24 * 60 * 60
+REFRESH_MAX_INTERVAL = 30 * 24 * 60 * 60
+
+REPORT = RunReport("fetch-oiwai-data")
+
+
+def resolve_url(url):
+    if not ORIGIN_OVERRIDE:
+        return url
+    parsed = urllib.parse.urlsplit(url)
+    query = f"?{parsed.query}" if parsed.query else ""
+    return f"{ORIGIN_OVERRIDE}/{parsed.netloc}{parsed.path}{query}"
+
+
+def record_page(url, body):
+    parsed = urllib.parse.urlsplit(url)
+    name = urllib.parse.quote(parsed.path or "/", safe="") + ".html"
+    path = RECORD_DIR / parsed.netloc / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(body)
 
-def fetch(url, timeout=30):
-    req = urllib.request.Request(
-        url,
-        headers={
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
-        },
-    )
-    with urllib.request.urlopen(req, timeout=timeout) as resp:
-        return resp.read().decode("utf-8", errors="ignore")
+
+def retry_delay(exc, attempt):
+    value = exc.headers.get("Retry-After") if exc.headers else None
+    if value and value.strip().isdigit():
+        return min(int(value.strip()), MAX_RETRY_DELAY)
+    return min(2**attempt, MAX_RETRY_DELAY)
+
+
+def fetch_page(url, timeout=30, until=None, etag="", last_modified=""):
+    stream = until is not None and STREAM_FETCH and not RECORD_DIR
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+    }
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    req = urllib.request.Request(resolve_url(url), headers=headers)
+    host = urllib.parse.urlsplit(url).netloc
+    attempt = 0
+    while True:
+        REPORT.count_host(host, "requests")
+        try:
+            with REPORT.span("fetch"):
+                with urllib.request.urlopen(req, timeout=timeout) as resp:
+                    validators = {
+                        "etag": resp.headers.get("ETag", ""),
+                        "last_modified": resp.headers.get("Last-Modified", ""),
+                    }
+                    if stream:
+                        received, text = read_until(resp, until, REPORT, host)
+                    else:
+                        body = resp.read()
+            break
+        except urllib.error.HTTPError as exc:
+            if exc.code == 304:
+                REPORT.count_host(host, "not_modified")
+                return {"status": 304, "text": None, "etag": etag, "last_modified": last_modified}
+            if exc.code not in RETRY_STATUSES or attempt >= MAX_RETRIES:
+                raise
+            REPORT.count_host(host, "retries")
+            time.sleep(retry_delay(exc, attempt))
+            attempt += 1
+    if stream:
+        REPORT.count_host(host, "bytes", received)
+        return {"status": 200, "text": text, **validators}
+    REPORT.count_host(host, "bytes", len(body))
+    if RECORD_DIR:
+        record_page(url, body)
+    with REPORT.span("decode"):
+        text = body.decode("utf-8", errors="ignore")
+    return {"status": 200, "text": text, "body": body, **validators}
+
+
+def polite_sleep(seconds):
+    if DELAY_SCALE > 0:
+        time.sleep(seconds * DELAY_SCALE)
 
 
 def clean(text):
-    text = re.sub(r"<br\s*/?>", "\n", text)
-    text = re.sub(r"<[^>]+>", "", text)
-    text = html_lib.unescape(text)
-    text = text.replace("\r", "\n")
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    with REPORT.span("clean"):
+        text = re.sub(r"<br\s*/?>", "\n", text)
+        text = re.sub(r"<[^>]+>", "", text)
+        text = html_lib.unescape(text)
+        text = text.replace("\r", "\n")
+        text = re.sub(r"\s+", " ", text)
+        return text.strip()
+
+
+def parse_page(category, url, parser, *args):
+    with REPORT.span("parse", category=category):
+        items = parser(*args)
+    REPORT.record_parse(category, url, len(items))
+    return items
 
 
 def ensure_url(href, base):
@@ -77,7 +186,7 @@ def ensure_url(href, base):
 
 
 def parse_oiwai_month(html):
-    table_match = re.search(r"<table class=\"detail\"[\s\S]*?</table>", html)
+    table_match = OIWAI_TABLE_RE.search(html)
     if not table_match:
         return []
     table = table_match.group(0)
@@ -126,10 +235,7 @@ def parse_oiwai_month(html):
 
 
 def parse_oiwai_color_code(html):
-    match = re.search(
-        r"<th[^>]*>\s*カラーコード\s*</th>\s*<td[^>]*>(#[0-9A-Fa-f]{6})",
-        html,
-    )
+    match = COLOR_CODE_RE.search(html)
     if match:
         return match.group(1).strip()
     match = re.search(r"background:\s*(#[0-9A-Fa-f]{6})", html)
@@ -226,8 +332,7 @@ def parse_andplants_day(html, month, day):
     return items
 
 
-def get_monokotoba_month_urls():
-    html = fetch(BIRD_INDEX)
+def parse_monokotoba_index(html):
     pattern = re.compile(
         r'<a href="(https://monokotoba\.com/archives/bird/\d+)"[^>]*>[\s\S]*?<img[^>]+alt="([^"]+)"',
         re.S,
@@ -257,7 +362,7 @@ def get_monokotoba_month_urls():
 
 
 def parse_monokotoba_month(html, month):
-    table_match = re.search(r"<table[\s\S]*?</table>", html)
+    table_match = FIRST_TABLE_RE.search(html)
     if not table_match:
         return []
     table = table_match.group(0)
@@ -296,7 +401,7 @@ def parse_monokotoba_month(html, month):
 
 
 def parse_aqsakana_month(html, month):
-    table_match = re.search(r"<table[\s\S]*?</table>", html)
+    table_match = FIRST_TABLE_RE.search(html)
     if not table_match:
         return []
     table = table_match.group(0)
@@ -334,123 +439,434 @@ def parse_aqsakana_month(html, month):
     return items
 
 
-def main():
-    meta = json.loads(META_PATH.read_text(encoding="utf-8-sig"))
-    category_keys = [item["key"] for item in meta.get("categories", [])]
-
-    dates = {}
+def date_keys():
     for month in range(1, 13):
         for day in range(1, DAYS_IN_MONTH[month - 1] + 1):
-            key = f"{month:02d}-{day:02d}"
-            dates[key] = {category_key: [] for category_key in category_keys}
+            yield f"{month:02d}-{day:02d}"
+
+
+def month_date_keys(month):
+    return [f"{month:02d}-{day:02d}" for day in range(1, DAYS_IN_MONTH[month - 1] + 1)]
+
 
+def make_job(kind, url, category, month=None, day=None, delay=0.25):
+    return {
+        "kind": kind,
+        "url": url,
+        "category": category,
+        "month": month,
+        "day": day,
+        "delay": delay,
+    }
+
+
+def root_jobs():
+    jobs = []
     for category_key, path in OIWAI_CATEGORIES.items():
         for month in range(1, 13):
-            url = f"{BASE_OIWAI}/{path}/{month}"
-            html = fetch(url)
-            items = parse_oiwai_month(html)
-            for entry in items:
-                date_key = f"{month:02d}-{entry['day']:02d}"
-                color_code = ""
-                if category_key == "color" and entry.get("source"):
-                    color_html = fetch(entry["source"])
-                    color_code = parse_oiwai_color_code(color_html)
-                dates[date_key][category_key].append(
-                    {
-                        "name": entry["name"],
-                        "meaning": entry["meaning"],
-                        **({"colorCode": color_code} if color_code else {}),
-                        "source": entry["source"],
-                    }
-                )
-                if category_key == "color":
-                    time.sleep(0.15)
-            time.sleep(0.25)
+            jobs.append(
+                make_job("oiwai_month", f"{BASE_OIWAI}/{path}/{month}", category_key, month)
+            )
+    jobs.append(make_job("andplants_index", ANDPLANTS_INDEX, "flower", delay=0))
+    jobs.append(make_job("monokotoba_index", BIRD_INDEX, "bird", delay=0))
+    for month in range(1, 13):
+        jobs.append(make_job("aqsakana_month", FISH_MONTH_URL.format(month=month), "fish", month))
+    for month in range(1, 13):
+        slug = BIRTHSTONE_MONTH_SLUGS[month - 1]
+        jobs.append(
+            make_job("birthstone_month", f"{BIRTHSTONE_BASE}/{slug}.html", "stone_monthly", month)
+        )
+    return jobs
 
-    try:
-        andplants_html = fetch(ANDPLANTS_INDEX)
-        andplants_days = parse_andplants_index(andplants_html)
-    except Exception:
-        andplants_days = {}
-    if not andplants_days:
-        for month in range(1, 13):
-            for day in range(1, DAYS_IN_MONTH[month - 1] + 1):
-                key = f"{month:02d}-{day:02d}"
-                andplants_days[key] = (
-                    f"{ANDPLANTS_BASE}/blogs/magazine/birthflower-{month:02d}{day:02d}"
-                )
 
-    for date_key, url in sorted(andplants_days.items()):
-        month, day = map(int, date_key.split("-"))
-        html = fetch(url)
-        items = parse_andplants_day(html, month, day)
-        for entry in items:
-            dates[date_key]["flower"].append(
-                {
-                    "name": entry["name"],
-                    "meaning": entry["meaning"],
-                    "source": url,
-                }
-            )
-        time.sleep(0.25)
+JOB_UNTIL = {
+    "oiwai_month": OIWAI_TABLE_RE,
+    "color_code": COLOR_CODE_RE,
+    "monokotoba_month": FIRST_TABLE_RE,
+    "aqsakana_month": FIRST_TABLE_RE,
+}
 
-    bird_month_urls = get_monokotoba_month_urls()
-    for month in range(1, 13):
-        url = bird_month_urls.get(month)
-        if not url:
-            continue
-        html = fetch(url)
-        items = parse_monokotoba_month(html, month)
+
+def month_patches(month, category, items_by_date):
+    return [
+        {"date": date_key, "category": category, "items": items_by_date.get(date_key, [])}
+        for date_key in month_date_keys(month)
+    ]
+
+
+def parse_day_table_job(job, html, parser):
+    month = job["month"]
+    items = parse_page(job["category"], job["url"], parser, html, month)
+    items_by_date = {}
+    for entry in items:
+        items_by_date.setdefault(f"{month:02d}-{entry['day']:02d}", []).append(
+            {
+                "name": entry["name"],
+                "meaning": entry["meaning"],
+                "source": "",
+            }
+        )
+    return month_patches(month, job["category"], items_by_date), [], len(items)
+
+
+def parse_job(job, html):
+    """Parse one fetched page into date patches and newly discovered pages."""
+    kind = job["kind"]
+    url = job["url"]
+    category = job["category"]
+    month = job["month"]
+
+    if kind == "oiwai_month":
+        items = parse_page(category, url, parse_oiwai_month, html)
+        items_by_date = {}
+        children = []
         for entry in items:
-            date_key = f"{month:02d}-{entry['day']:02d}"
-            dates[date_key]["bird"].append(
+            items_by_date.setdefault(f"{month:02d}-{entry['day']:02d}", []).append(
                 {
                     "name": entry["name"],
                     "meaning": entry["meaning"],
-                    "source": "",
+                    "source": entry["source"],
                 }
             )
-        time.sleep(0.25)
+            if category == "color" and entry.get("source"):
+                children.append(
+                    make_job("color_code", entry["source"], category, month, entry["day"], 0.15)
+                )
+        return month_patches(month, category, items_by_date), children, len(items)
 
-    for month in range(1, 13):
-        fish_html = fetch(FISH_MONTH_URL.format(month=month))
-        fish_items = parse_aqsakana_month(fish_html, month)
-        for entry in fish_items:
-            date_key = f"{month:02d}-{entry['day']:02d}"
-            dates[date_key]["fish"].append(
+    if kind == "color_code":
+        with REPORT.span("parse", category="color_code"):
+            color_code = parse_oiwai_color_code(html)
+        REPORT.record_parse("color_code", url, 1 if color_code else 0)
+        if not color_code:
+            return [], [], 0
+        patch = {
+            "date": f"{month:02d}-{job['day']:02d}",
+            "category": category,
+            "source": url,
+            "colorCode": color_code,
+        }
+        return [patch], [], 1
+
+    if kind == "andplants_index":
+        days = {}
+        if html:
+            days = parse_page("flower_index", url, parse_andplants_index, html)
+        if not days:
+            days = {
+                date_key: f"{ANDPLANTS_BASE}/blogs/magazine/birthflower-{date_key.replace('-', '')}"
+                for date_key in date_keys()
+            }
+        children = []
+        for date_key, day_url in sorted(days.items()):
+            day_month, day = map(int, date_key.split("-"))
+            children.append(make_job("andplants_day", day_url, category, day_month, day))
+        return [], children, len(days)
+
+    if kind == "andplants_day":
+        items = parse_page(category, url, parse_andplants_day, html, month, job["day"])
+        patch = {
+            "date": f"{month:02d}-{job['day']:02d}",
+            "category": category,
+            "items": [
                 {
                     "name": entry["name"],
                     "meaning": entry["meaning"],
-                    "source": "",
+                    "source": url,
                 }
-            )
-        time.sleep(0.25)
+                for entry in items
+            ],
+        }
+        return [patch], [], len(items)
 
-    monthly_birthstones = {}
-    for month in range(1, 13):
-        slug = BIRTHSTONE_MONTH_SLUGS[month - 1]
-        url = f"{BIRTHSTONE_BASE}/{slug}.html"
-        html = fetch(url)
-        items = parse_birthstone_month(html)
-        if items:
-            monthly_birthstones[month] = {
-                "items": items,
-                "source": url,
-            }
-        time.sleep(0.25)
+    if kind == "monokotoba_index":
+        month_urls = parse_monokotoba_index(html)
+        REPORT.record_parse("bird_index", url, len(month_urls))
+        children = [
+            make_job("monokotoba_month", month_urls[index], category, index)
+            for index in range(1, 13)
+            if month_urls.get(index)
+        ]
+        return [], children, len(month_urls)
 
-    for month, payload in monthly_birthstones.items():
-        for day in range(1, DAYS_IN_MONTH[month - 1] + 1):
-            date_key = f"{month:02d}-{day:02d}"
-            for item in payload["items"]:
-                dates[date_key]["stone_monthly"].append(
+    if kind == "monokotoba_month":
+        return parse_day_table_job(job, html, parse_monokotoba_month)
+
+    if kind == "aqsakana_month":
+        return parse_day_table_job(job, html, parse_aqsakana_month)
+
+    if kind == "birthstone_month":
+        items = parse_page(category, url, parse_birthstone_month, html)
+        if not items:
+            return [], [], 0
+        patches = [
+            {
+                "date": date_key,
+                "category": category,
+                "items": [
                     {
                         "name": item["name"],
                         "meaning": item["meaning"],
-                        "source": payload["source"],
+                        "source": url,
                     }
-                )
+                    for item in items
+                ],
+            }
+            for date_key in month_date_keys(month)
+        ]
+        return patches, [], len(items)
+
+    raise ValueError(f"Unknown job kind: {kind}")
+
+
+def with_color_code(item, color_code):
+    updated = {key: value for key, value in item.items() if key not in ("colorCode", "source")}
+    updated["colorCode"] = color_code
+    updated["source"] = item.get("source", "")
+    return updated
+
+
+def apply_patch(dates, patch):
+    date_data = dates.get(patch["date"])
+    if date_data is None:
+        return False
+    category = patch["category"]
+    current = date_data.get(category) or []
+
+    if "colorCode" in patch:
+        changed = False
+        for index, item in enumerate(current):
+            if item.get("source") == patch["source"] and item.get("colorCode") != patch["colorCode"]:
+                current[index] = with_color_code(item, patch["colorCode"])
+                changed = True
+        return changed
+
+    items = patch["items"]
+    # Color codes come from separate pages; keep them when only the month page is re-parsed.
+    known_codes = {item.get("source"): item.get("colorCode") for item in current}
+    items = [
+        with_color_code(item, known_codes[item["source"]])
+        if not item.get("colorCode") and known_codes.get(item.get("source"))
+        else item
+        for item in items
+    ]
+    if current == items and category in date_data:
+        return False
+    date_data[category] = items
+    return True
+
+
+def update_freshness(pages, job, page, digest, changed, parsed=True):
+    now = time.time()
+    entry = pages.get(job["url"])
+    if entry is None:
+        entry = pages[job["url"]] = {"job": job, "interval": REFRESH_MIN_INTERVAL}
+    entry["job"] = job
+    entry["last_fetched"] = now
+    # Validators of a page that was not parsed are kept, so the next poll fetches it again.
+    if page["status"] == 200 and parsed:
+        entry["etag"] = page["etag"]
+        entry["last_modified"] = page["last_modified"]
+        entry["hash"] = digest
+    if changed:
+        entry["last_changed"] = now
+        entry["interval"] = REFRESH_MIN_INTERVAL
+    else:
+        entry["interval"] = min(entry.get("interval", REFRESH_MIN_INTERVAL) * 2, REFRESH_MAX_INTERVAL)
+    entry["next_due"] = now + entry["interval"]
+
+
+def fetch_job_page(job, entry=None, refresh=False, full=False):
+    try:
+        return fetch_page(
+            job["url"],
+            until=None if full else JOB_UNTIL.get(job["kind"]),
+            etag=(entry or {}).get("etag", ""),
+            last_modified=(entry or {}).get("last_modified", ""),
+        )
+    except Exception:
+        if job["kind"] != "andplants_index" or refresh:
+            raise
+        # parse_job falls back to the known day URLs when the index is unavailable.
+        return {"status": 200, "text": "", "body": b"", "etag": "", "last_modified": ""}
+
+
+def drop_page(pages, url):
+    entry = pages.pop(url, None)
+    if entry is None:
+        return
+    print(f"Dropped page no longer linked: {url}")
+    for child_url in entry.get("children", []):
+        drop_page(pages, child_url)
+
+
+def track_children(pages, job, children):
+    # Forget pages the parent no longer links to so they stop being polled and patched.
+    entry = pages[job["url"]]
+    previous = entry.get("children", [])
+    current = [child["url"] for child in children]
+    if current or previous:
+        entry["children"] = current
+    for url in set(previous) - set(current):
+        drop_page(pages, url)
+
+
+def run_job(job, dates, pages=None, refresh=False):
+    entry = (pages or {}).get(job["url"]) if refresh else None
+    page = fetch_job_page(job, entry, refresh)
+    polite_sleep(job["delay"])
+
+    digest = ""
+    changed = page["status"] == 200
+    if changed:
+        digest = hashlib.sha256(page["text"].encode("utf-8")).hexdigest()
+        changed = not (entry and entry.get("hash") == digest)
+    if not changed:
+        if pages is not None:
+            update_freshness(pages, job, page, digest, changed)
+        return [], set()
+
+    patches, children, rows = parse_job(job, page["text"])
+    skipped = refresh and rows == 0
+    if pages is not None:
+        update_freshness(pages, job, page, digest, changed, parsed=not skipped)
+    if skipped:
+        # Most likely a markup change; keep the data we have instead of wiping it.
+        print(f"Skipped empty parse: {job['url']}")
+        return [], set()
+    if pages is not None:
+        track_children(pages, job, children)
+    changed_dates = set()
+    for patch in patches:
+        if apply_patch(dates, patch):
+            changed_dates.add(patch["date"])
+    return children, changed_dates
+
+
+def run_jobs(jobs, dates, pages=None):
+    # Depth-first so discovered pages are fetched right after the page that links them.
+    stack = list(reversed(jobs))
+    changed_dates = set()
+    while stack:
+        children, changed = run_job(stack.pop(), dates, pages)
+        changed_dates |= changed
+        stack.extend(reversed(children))
+    return changed_dates
+
+
+def discovered_jobs(job, html):
+    # Only these pages link to further pages; everything else is parsed in phase two.
+    if job["kind"] in ("andplants_index", "monokotoba_index") or (
+        job["kind"] == "oiwai_month" and job["category"] == "color"
+    ):
+        return parse_job(job, html)[1]
+    return []
+
+
+def store_file_name(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:24] + ".html.gz"
+
+
+def fetch_to_store(store_dir, jobs):
+    """Phase one: fetch every page whole into store_dir, one gzip file per URL plus index.json."""
+    # Build the new store beside the old one so a failed crawl never leaves a half-updated store.
+    partial_dir = store_dir.with_name(store_dir.name + ".partial")
+    shutil.rmtree(partial_dir, ignore_errors=True)
+    pages_dir = partial_dir / "pages"
+    pages_dir.mkdir(parents=True)
+    entries = []
+    stack = list(reversed(jobs))
+    while stack:
+        job = stack.pop()
+        # Never stream here: a later parser may need more of the page than today's does.
+        page = fetch_job_page(job, full=True)
+        polite_sleep(job["delay"])
+        body = page["body"]
+        name = store_file_name(job["url"])
+        with REPORT.span("store"):
+            (pages_dir / name).write_bytes(gzip.compress(body, mtime=0))
+        entries.append(
+            {
+                "job": job,
+                "file": f"pages/{name}",
+                "sha256": hashlib.sha256(body).hexdigest(),
+                "bytes": len(body),
+                "fetched_at": time.time(),
+            }
+        )
+        stack.extend(reversed(discovered_jobs(job, page["text"])))
+
+    index = {
+        "version": 1,
+        "full_pages": True,
+        "pages": entries,
+    }
+    (partial_dir / "index.json").write_text(
+        json.dumps(index, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    old_dir = store_dir.with_name(store_dir.name + ".old")
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if store_dir.exists():
+        store_dir.rename(old_dir)
+    partial_dir.rename(store_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    print(f"Stored {len(entries)} pages in {store_dir}")
+
+
+def parse_stored_page(store_dir, entry):
+    global REPORT
+    # Runs in a worker process; the counters go back to the parent to be merged.
+    REPORT = RunReport("fetch-oiwai-data")
+    body = gzip.decompress((store_dir / entry["file"]).read_bytes())
+    if hashlib.sha256(body).hexdigest() != entry["sha256"]:
+        raise SystemExit(
+            f"{store_dir / entry['file']} does not match index.json; run --phase fetch again."
+        )
+    html = body.decode("utf-8", errors="ignore")
+    patches, _children, _rows = parse_job(entry["job"], html)
+    return patches, REPORT.to_dict()
+
 
+def parse_store(store_dir, out_path, workers=None):
+    """Phase two: parse the stored pages in parallel and merge them in crawl order."""
+    index_path = store_dir / "index.json"
+    if not index_path.exists():
+        raise SystemExit(f"No page store at {store_dir}; run with --phase fetch first.")
+    index = json.loads(index_path.read_text(encoding="utf-8"))
+    if not index.get("full_pages"):
+        # Older stores kept streamed pages cut off after the table; parsing them would be lossy.
+        raise SystemExit(f"{store_dir} holds truncated pages; run --phase fetch again to store whole pages.")
+    entries = index["pages"]
+    dates = new_dates()
+    with ProcessPoolExecutor(max_workers=workers or None) as pool:
+        # map() yields in submission order, so patches apply exactly as a sequential crawl would.
+        results = pool.map(parse_stored_page, repeat(store_dir), entries, chunksize=8)
+        for patches, report in results:
+            REPORT.merge(report)
+            with REPORT.span("merge"):
+                for patch in patches:
+                    apply_patch(dates, patch)
+    print(f"Parsed {len(entries)} stored pages")
+    write_birthdata(out_path, dates)
+
+
+def run_phases(phase, store_dir, out_path, workers):
+    if phase in ("fetch", "all"):
+        fetch_to_store(store_dir, root_jobs())
+    if phase in ("parse", "all"):
+        parse_store(store_dir, out_path, workers)
+
+
+def new_dates():
+    meta = json.loads(META_PATH.read_text(encoding="utf-8-sig"))
+    category_keys = [item["key"] for item in meta.get("categories", [])]
+    return {
+        date_key: {category_key: [] for category_key in category_keys}
+        for date_key in date_keys()
+    }
+
+
+def write_birthdata(out_path, dates):
     payload = {
         "meta": {
             "locale": "ja-JP",
@@ -459,11 +875,178 @@ def main():
         },
         "dates": dates,
     }
+    # Refuse to overwrite good data with a malformed crawl.
+    validate_birthdata(payload, load_category_keys(META_PATH))
+
+    with REPORT.span("write"):
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(
+            json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        compiled_path = compile_birthdata(out_path, META_PATH)
+        # Refreshes can patch colorCode, so /api/color must not keep serving the old index.
+        color_index_path = color_index_path_for(out_path)
+        write_color_index(payload, color_index_path)
+    print("Saved", out_path)
+    print("Saved", compiled_path)
+    print("Saved", color_index_path)
 
-    OUT_PATH.write_text(
-        json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"
+
+def load_state(state_path):
+    if not state_path.exists():
+        return {}
+    data = json.loads(state_path.read_text(encoding="utf-8"))
+    return data.get("pages", {}) if isinstance(data, dict) else {}
+
+
+def save_state(state_path, pages):
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    state_path.write_text(
+        json.dumps({"pages": pages}, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+
+
+def crawl(out_path):
+    dates = new_dates()
+    run_jobs(root_jobs(), dates)
+    write_birthdata(out_path, dates)
+
+
+def refresh_due(dates, pages):
+    now = time.time()
+    due = sorted(
+        (entry for entry in pages.values() if entry.get("next_due", 0) <= now),
+        key=lambda entry: (entry.get("next_due", 0), entry["job"]["url"]),
     )
-    print("Saved", OUT_PATH)
+    changed_dates = set()
+    for entry in due:
+        job = entry["job"]
+        if pages.get(job["url"]) is not entry:
+            continue
+        try:
+            children, changed = run_job(job, dates, pages, refresh=True)
+        except (urllib.error.URLError, OSError) as exc:
+            print(f"Refresh failed: {job['url']} ({exc})")
+            entry["next_due"] = time.time() + entry.get("interval", REFRESH_MIN_INTERVAL)
+            continue
+        changed_dates |= changed
+        new_children = [child for child in children if child["url"] not in pages]
+        if new_children:
+            changed_dates |= run_jobs(new_children, dates, pages)
+    return len(due), changed_dates
+
+
+def watch(out_path, state_path, once):
+    pages = load_state(state_path)
+    if pages and out_path.exists():
+        dates = json.loads(out_path.read_text(encoding="utf-8-sig"))["dates"]
+    else:
+        pages = {}
+        dates = new_dates()
+        run_jobs(root_jobs(), dates, pages)
+        write_birthdata(out_path, dates)
+        save_state(state_path, pages)
+        if once:
+            return
+
+    try:
+        while True:
+            polled, changed_dates = refresh_due(dates, pages)
+            if changed_dates:
+                write_birthdata(out_path, dates)
+                print(f"Patched {len(changed_dates)} dates: {', '.join(sorted(changed_dates))}")
+            elif polled:
+                print(f"Polled {polled} pages, no changes.")
+            save_state(state_path, pages)
+            if once:
+                break
+            next_due = min(entry.get("next_due", 0) for entry in pages.values())
+            time.sleep(max(1, next_due - time.time()))
+    except KeyboardInterrupt:
+        save_state(state_path, pages)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fetch birthday symbol data.")
+    parser.add_argument(
+        "--origin",
+        default=os.environ.get("FETCH_ORIGIN_OVERRIDE", ""),
+        help="Send every request to this base URL instead (e.g. mock-origin-server.py).",
+    )
+    parser.add_argument("--out", default=str(OUT_PATH), help="Output JSON path.")
+    parser.add_argument("--record-dir", help="Save every fetched page under this directory.")
+    parser.add_argument(
+        "--delay-scale",
+        type=float,
+        default=1.0,
+        help="Multiplier for the polite delay between requests (0 disables it).",
+    )
+    parser.add_argument(
+        "--full-fetch",
+        action="store_true",
+        help="Always read whole pages instead of stopping after the parsed table.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and re-poll pages on a freshness-aware schedule.",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="With --watch, poll the pages that are due once and exit (for cron).",
+    )
+    parser.add_argument("--state", default=str(STATE_PATH), help="Freshness state path for --watch.")
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=REFRESH_MIN_INTERVAL,
+        help="Seconds before re-polling a page that just changed.",
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=REFRESH_MAX_INTERVAL,
+        help="Upper bound for the back-off of pages that never change.",
+    )
+    parser.add_argument(
+        "--phase",
+        choices=("fetch", "parse", "all"),
+        help="Split the crawl: fetch pages into --store, parse the store, or both in turn.",
+    )
+    parser.add_argument("--store", default=str(STORE_DIR), help="Page store directory for --phase.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Parser processes for --phase parse/all (default: CPU count).",
+    )
+    add_report_args(parser)
+    return parser.parse_args()
+
+
+def main():
+    global ORIGIN_OVERRIDE, RECORD_DIR, DELAY_SCALE, STREAM_FETCH
+    global REFRESH_MIN_INTERVAL, REFRESH_MAX_INTERVAL
+
+    args = parse_args()
+    ORIGIN_OVERRIDE = args.origin.rstrip("/")
+    RECORD_DIR = Path(args.record_dir) if args.record_dir else None
+    DELAY_SCALE = args.delay_scale
+    STREAM_FETCH = not args.full_fetch
+    REFRESH_MIN_INTERVAL = args.min_interval
+    REFRESH_MAX_INTERVAL = max(args.max_interval, args.min_interval)
+    out_path = Path(args.out)
+    if args.watch:
+        state_path = Path(args.state)
+        run_with_report(REPORT, args, lambda: watch(out_path, state_path, args.once))
+    elif args.phase:
+        store_dir = Path(args.store)
+        run_with_report(
+            REPORT, args, lambda: run_phases(args.phase, store_dir, out_path, args.workers)
+        )
+    else:
+        run_with_report(REPORT, args, lambda: crawl(out_path))
 
 
 if __name__ == "__main__":
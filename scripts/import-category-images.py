@@ -1,3 +1,4 @@
+import argparse
 import json
 import os
 import shutil
@@ -9,12 +10,16 @@ import urllib.request
 import urllib.error
 from pathlib import Path
 
+from run_report import RunReport, add_report_args, run_with_report
+
 
 ROOT = Path(__file__).resolve().parents[1]
 URLS_PATH = ROOT / "content" / "category-image-urls.json"
 OUT_PATH = ROOT / "content" / "category-images.json"
 IMAGES_ROOT = ROOT / "public" / "images" / "categories"
 
+REPORT = RunReport("import-category-images")
+
 HTML_HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -71,6 +76,16 @@ def build_headers(base_headers, referer=None):
     return headers
 
 
+def read_url(req, timeout=30):
+    host = urllib.parse.urlsplit(req.full_url).netloc
+    REPORT.count_host(host, "requests")
+    with REPORT.span("fetch"):
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            data = resp.read()
+    REPORT.count_host(host, "bytes", len(data))
+    return data
+
+
 def fetch_to_temp(url, referer=None):
     last_exc = None
     referers = [referer]
@@ -82,12 +97,12 @@ def fetch_to_temp(url, referer=None):
         headers = build_headers(DOWNLOAD_HEADERS, ref)
         req = urllib.request.Request(url, headers=headers)
         try:
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                data = resp.read()
+            data = read_url(req)
             break
         except urllib.error.HTTPError as exc:
             last_exc = exc
             if exc.code in (403, 429):
+                REPORT.count_host(urllib.parse.urlsplit(url).netloc, "retries")
                 continue
             raise
     else:
@@ -99,18 +114,20 @@ def fetch_to_temp(url, referer=None):
 
 
 def run_magick(args):
-    subprocess.run(["magick", *args], check=True)
+    with REPORT.span("magick"):
+        subprocess.run(["magick", *args], check=True)
 
 
 def fetch_text(url):
     req = urllib.request.Request(url, headers=HTML_HEADERS)
     try:
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            return resp.read().decode("utf-8", errors="ignore")
+        data = read_url(req)
     except urllib.error.HTTPError as exc:
         if exc.code in (403, 429):
             return ""
         raise
+    with REPORT.span("decode"):
+        return data.decode("utf-8", errors="ignore")
 
 
 def fetch_pixabay_oembed(photo_url):
@@ -119,8 +136,9 @@ def fetch_pixabay_oembed(photo_url):
         + urllib.parse.quote(photo_url, safe="")
     )
     req = urllib.request.Request(oembed_url, headers={"User-Agent": "Mozilla/5.0"})
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        return json.loads(resp.read().decode("utf-8"))
+    data = read_url(req)
+    with REPORT.span("decode"):
+        return json.loads(data.decode("utf-8"))
 
 
 def parse_pixabay_author(html):
@@ -216,7 +234,7 @@ def get_next_index(items, category):
     return max_index + 1
 
 
-def main():
+def import_images():
     ensure_magick()
     payload = read_urls()
     if not isinstance(payload, dict):
@@ -272,6 +290,7 @@ def main():
                 )
             except urllib.error.HTTPError as exc:
                 skipped.append({"url": url, "reason": f"HTTP {exc.code}"})
+                REPORT.count_category(category, "images_skipped")
                 print(f"Skip ({exc.code}): {url}")
                 continue
             jpg_name = f"{category}-{next_index:02d}.jpg"
@@ -289,16 +308,19 @@ def main():
                     "src": f"/images/categories/{category}/{webp_name}",
                     "photographer": photographer,
                     "source": source,
+                    "bytes": webp_path.stat().st_size,
                 }
             )
             existing_sources.add(normalize_source(source))
+            REPORT.count_category(category, "images_imported")
             next_index += 1
 
         result[category] = existing_items
 
-    OUT_PATH.write_text(
-        json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    with REPORT.span("write"):
+        OUT_PATH.write_text(
+            json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
     print("Saved", OUT_PATH)
     if skipped:
         print("Skipped URLs:")
@@ -306,5 +328,12 @@ def main():
             print(f"- {item['url']} ({item['reason']})")
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Import category background images.")
+    add_report_args(parser)
+    args = parser.parse_args()
+    run_with_report(REPORT, args, import_images)
+
+
 if __name__ == "__main__":
     main()
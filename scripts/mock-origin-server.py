@@ -0,0 +1,387 @@
+import argparse
+import hashlib
+import html as html_lib
+import json
+import random
+import signal
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_PATH = ROOT / "content" / "birthdata.json"
+
+OIWAI_HOST = "www.oiwai-item.com"
+ANDPLANTS_HOST = "andplants.jp"
+MONOKOTOBA_HOST = "monokotoba.com"
+AQSAKANA_HOST = "aqsakana.com"
+BIRTHSTONE_HOST = "birthstone.jp"
+
+OIWAI_PATHS = {
+    "stone": "stone",
+    "color": "color",
+    "plant": "tree",
+    "alcohol": "alcohol",
+    "sushi": "sushi",
+    "fruit": "fruit",
+    "star": "star",
+}
+
+BIRTHSTONE_MONTH_SLUGS = [
+    "january",
+    "february",
+    "march",
+    "april",
+    "may",
+    "june",
+    "july",
+    "august",
+    "september",
+    "october",
+    "november",
+    "december",
+]
+
+DAYS_IN_MONTH = [31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+MONOKOTOBA_ARCHIVE_BASE = 1000
+CHUNK_SIZE = 16 * 1024
+
+
+def page_file_name(path):
+    return urllib.parse.quote(path or "/", safe="") + ".html"
+
+
+def wrap_page(title, body, pad_bytes):
+    footer = ""
+    if pad_bytes > 0:
+        filler = "<!-- footer filler -->\n<script>var ad = 0;</script>\n"
+        footer = filler * (pad_bytes // len(filler) + 1)
+    return (
+        "<!DOCTYPE html>\n<html lang=\"ja\"><head><meta charset=\"utf-8\">"
+        f"<title>{html_lib.escape(title)}</title></head><body>\n"
+        f"{body}\n<footer>{footer}</footer></body></html>\n"
+    )
+
+
+def meaning_text(item, separator=" "):
+    meaning = item.get("meaning") or []
+    if isinstance(meaning, str):
+        return meaning
+    return separator.join(str(value) for value in meaning)
+
+
+class SyntheticSite:
+    """Render pages in the markup each parser expects from birthdata.json."""
+
+    def __init__(self, data, pad_bytes=0):
+        self.dates = data.get("dates", {})
+        self.pad_bytes = pad_bytes
+
+    def items(self, date_key, category):
+        value = self.dates.get(date_key, {}).get(category)
+        return value if isinstance(value, list) else []
+
+    def render(self, host, path):
+        path = path.rstrip("/") or "/"
+        if host == OIWAI_HOST:
+            return self.render_oiwai(path)
+        if host == ANDPLANTS_HOST:
+            return self.render_andplants(path)
+        if host == MONOKOTOBA_HOST:
+            return self.render_monokotoba(path)
+        if host == AQSAKANA_HOST:
+            return self.render_aqsakana(path)
+        if host == BIRTHSTONE_HOST:
+            return self.render_birthstone(path)
+        return None
+
+    def render_oiwai(self, path):
+        parts = path.strip("/").split("/")
+        category = OIWAI_PATHS.get(parts[0]) if parts else None
+        if not category or not all(part.isdigit() for part in parts[1:]):
+            return None
+        if len(parts) == 2:
+            month = int(parts[1])
+            if not 1 <= month <= 12:
+                return None
+            rows = []
+            for day in range(1, DAYS_IN_MONTH[month - 1] + 1):
+                items = self.items(f"{month:02d}-{day:02d}", category)
+                if not items:
+                    continue
+                item = items[0]
+                rows.append(
+                    f"<tr><th colspan=\"2\"><a href=\"/{parts[0]}/{month}/{day}\">"
+                    f"{day}日</a></th></tr>"
+                )
+                rows.append(
+                    f"<tr><td class=\"data\">{html_lib.escape(item.get('name', ''))}</td>"
+                    f"<td class=\"data\">{html_lib.escape(meaning_text(item))}</td></tr>"
+                )
+            body = "<table class=\"detail\">\n" + "\n".join(rows) + "\n</table>"
+            return wrap_page(f"{month}月", body, self.pad_bytes)
+        if len(parts) == 3:
+            month, day = int(parts[1]), int(parts[2])
+            items = self.items(f"{month:02d}-{day:02d}", category)
+            item = items[0] if items else {}
+            rows = [f"<tr><th>名前</th><td>{html_lib.escape(item.get('name', ''))}</td></tr>"]
+            if item.get("colorCode"):
+                rows.append(f"<tr><th>カラーコード</th><td>{item['colorCode']}</td></tr>")
+            body = "<table class=\"detail\">\n" + "\n".join(rows) + "\n</table>"
+            return wrap_page(f"{month}月{day}日", body, self.pad_bytes)
+        return None
+
+    def render_andplants(self, path):
+        if path == "/blogs/magazine/birthflower-365":
+            links = []
+            for month in range(1, 13):
+                for day in range(1, DAYS_IN_MONTH[month - 1] + 1):
+                    links.append(
+                        f"<li><a href=\"/blogs/magazine/birthflower-{month:02d}{day:02d}\">"
+                        f"{month}月{day}日</a></li>"
+                    )
+            return wrap_page("誕生花365日", "<ul>\n" + "\n".join(links) + "\n</ul>", self.pad_bytes)
+        prefix = "/blogs/magazine/birthflower-"
+        suffix = path[len(prefix):] if path.startswith(prefix) else ""
+        if len(suffix) != 4 or not suffix.isdigit():
+            return None
+        month, day = int(suffix[:2]), int(suffix[2:])
+        items = self.items(f"{month:02d}-{day:02d}", "flower")
+        rows = ["<tr><th>日付</th><th>誕生花</th><th>花言葉</th></tr>"]
+        for item in items:
+            meaning = "".join(f"「{value}」" for value in item.get("meaning") or [])
+            rows.append(
+                f"<tr><td>{month}月{day}日</td>"
+                f"<td>{html_lib.escape(item.get('name', ''))}</td>"
+                f"<td>{html_lib.escape(meaning)}</td></tr>"
+            )
+        body = "<table>\n" + "\n".join(rows) + "\n</table>"
+        return wrap_page(f"{month}月{day}日の誕生花", body, self.pad_bytes)
+
+    def render_day_table(self, month, category):
+        rows = []
+        for day in range(1, DAYS_IN_MONTH[month - 1] + 1):
+            for item in self.items(f"{month:02d}-{day:02d}", category):
+                rows.append(
+                    f"<tr><td>{month}月{day}日</td>"
+                    f"<td>{html_lib.escape(item.get('name', ''))}</td>"
+                    f"<td>{html_lib.escape(meaning_text(item))}</td></tr>"
+                )
+        return "<table>\n" + "\n".join(rows) + "\n</table>"
+
+    def render_monokotoba(self, path):
+        if path == "/bird":
+            links = []
+            for month in range(1, 13):
+                url = f"https://{MONOKOTOBA_HOST}/archives/bird/{MONOKOTOBA_ARCHIVE_BASE + month}"
+                links.append(f"<a href=\"{url}\"><img src=\"/m{month}.jpg\" alt=\"{month}月の誕生鳥\"></a>")
+            return wrap_page("誕生鳥", "\n".join(links), self.pad_bytes)
+        prefix = "/archives/bird/"
+        archive = path[len(prefix):] if path.startswith(prefix) else ""
+        if not archive.isdigit():
+            return None
+        month = int(archive) - MONOKOTOBA_ARCHIVE_BASE
+        if not 1 <= month <= 12:
+            return None
+        return wrap_page(f"{month}月の誕生鳥", self.render_day_table(month, "bird"), self.pad_bytes)
+
+    def render_aqsakana(self, path):
+        if path == "/words":
+            return wrap_page("誕生魚", "<p>index</p>", self.pad_bytes)
+        prefix = "/words/index/"
+        month_text = path[len(prefix):] if path.startswith(prefix) else ""
+        if not month_text.isdigit() or not 1 <= int(month_text) <= 12:
+            return None
+        month = int(month_text)
+        return wrap_page(f"{month}月の誕生魚", self.render_day_table(month, "fish"), self.pad_bytes)
+
+    def render_birthstone(self, path):
+        slug = path.strip("/").removesuffix(".html")
+        if slug not in BIRTHSTONE_MONTH_SLUGS:
+            return None
+        month = BIRTHSTONE_MONTH_SLUGS.index(slug) + 1
+        sections = []
+        seen = set()
+        for item in self.items(f"{month:02d}-01", "stone_monthly"):
+            name = item.get("name", "")
+            if name in seen:
+                continue
+            seen.add(name)
+            sections.append(
+                f"<h2>{month}月の誕生石「{html_lib.escape(name)}」</h2>\n"
+                f"<h3>石言葉</h3>{html_lib.escape(meaning_text(item, '、'))}\n"
+            )
+        return wrap_page(f"{month}月の誕生石", "\n".join(sections), self.pad_bytes)
+
+
+class MockOrigin:
+    def __init__(self, args):
+        self.pages_dir = Path(args.pages_dir) if args.pages_dir else None
+        self.latency = args.latency_ms / 1000
+        self.jitter = args.jitter_ms / 1000
+        self.rate_429 = args.rate_429
+        self.retry_after = args.retry_after
+        self.bandwidth = args.bandwidth
+        self.seed = args.seed
+        self.synthetic = None
+        data_path = Path(args.data)
+        if not args.no_synthetic and data_path.exists():
+            data = json.loads(data_path.read_text(encoding="utf-8-sig"))
+            self.synthetic = SyntheticSite(data, pad_bytes=args.pad_bytes)
+        self.lock = threading.Lock()
+        self.attempts = {}
+        self.stats = {"requests": 0, "bytes": 0, "throttled": 0, "missing": 0, "not_modified": 0}
+
+    def next_attempt(self, target):
+        with self.lock:
+            count = self.attempts.get(target, 0)
+            self.attempts[target] = count + 1
+            self.stats["requests"] += 1
+            return count
+
+    def rng(self, target, attempt):
+        # Seeded per URL and attempt so results do not depend on request order.
+        digest = hashlib.sha256(f"{self.seed}:{target}:{attempt}".encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def load(self, host, path):
+        if self.pages_dir:
+            recorded = self.pages_dir / host / page_file_name(path)
+            if recorded.exists():
+                return recorded.read_bytes()
+        if self.synthetic:
+            text = self.synthetic.render(host, path)
+            if text is not None:
+                return text.encode("utf-8")
+        return None
+
+    def add_stat(self, key, value=1):
+        with self.lock:
+            self.stats[key] += value
+
+
+def make_handler(origin):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            parsed = urllib.parse.urlsplit(self.path)
+            host, _, rest = parsed.path.lstrip("/").partition("/")
+            path = "/" + rest
+            target = f"{host}{path}"
+            attempt = origin.next_attempt(target)
+            rng = origin.rng(target, attempt)
+
+            delay = origin.latency + rng.uniform(-origin.jitter, origin.jitter)
+            if delay > 0:
+                time.sleep(delay)
+
+            if origin.rate_429 > 0 and rng.random() < origin.rate_429:
+                origin.add_stat("throttled")
+                self.send_response(429)
+                self.send_header("Retry-After", str(origin.retry_after))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            body = origin.load(host, path)
+            if body is None:
+                origin.add_stat("missing")
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                origin.add_stat("not_modified")
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.write_throttled(body)
+
+        def write_throttled(self, body):
+            started = time.monotonic()
+            sent = 0
+            try:
+                for offset in range(0, len(body), CHUNK_SIZE):
+                    chunk = body[offset : offset + CHUNK_SIZE]
+                    self.wfile.write(chunk)
+                    sent += len(chunk)
+                    if origin.bandwidth > 0:
+                        wait = sent / origin.bandwidth - (time.monotonic() - started)
+                        if wait > 0:
+                            time.sleep(wait)
+            except (BrokenPipeError, ConnectionResetError):
+                # Clients may hang up once they have read what they need.
+                pass
+            origin.add_stat("bytes", sent)
+
+        def log_message(self, format, *args):
+            if not self.server.quiet:
+                super().log_message(format, *args)
+
+    return Handler
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Serve stand-in pages for the crawler's source sites."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--pages-dir",
+        help="Directory of recorded pages (see fetch-oiwai-data.py --record-dir).",
+    )
+    parser.add_argument(
+        "--data",
+        default=str(DATA_PATH),
+        help="birthdata.json used to render synthetic pages.",
+    )
+    parser.add_argument(
+        "--no-synthetic",
+        action="store_true",
+        help="Only serve recorded pages; do not render pages from birthdata.json.",
+    )
+    parser.add_argument("--pad-bytes", type=int, default=0, help="Footer filler per synthetic page.")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--rate-429", type=float, default=0, help="Share of requests answered with 429.")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--bandwidth", type=int, default=0, help="Bytes per second per response (0 = unlimited).")
+    parser.add_argument("--seed", default="0")
+    parser.add_argument("--quiet", action="store_true")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    origin = MockOrigin(args)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(origin))
+    server.quiet = args.quiet
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"Serving mock origin on http://{args.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(origin.stats))
+
+
+if __name__ == "__main__":
+    main()
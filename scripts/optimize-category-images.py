@@ -0,0 +1,311 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from run_report import RunReport, add_report_args, run_with_report
+
+
+ROOT = Path(__file__).resolve().parents[1]
+IMAGES_JSON_PATH = ROOT / "content" / "category-images.json"
+PUBLIC_ROOT = ROOT / "public"
+
+FLOAT_RE = re.compile(r"[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?")
+NORMALIZED_RE = re.compile(r"\(([0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)\)")
+CHECK_IMAGES = 3
+# One thread per process; parallelism comes from running images side by side.
+THREAD_LIMIT = ["-limit", "thread", "1"]
+
+REPORT = RunReport("optimize-category-images")
+
+
+def ensure_magick():
+    if shutil.which("magick") is None:
+        raise RuntimeError("ImageMagick is not installed or not in PATH.")
+
+
+def run_magick(args):
+    with REPORT.span("magick"):
+        subprocess.run(["magick", *THREAD_LIMIT, *args], check=True)
+
+
+def image_size(path):
+    result = subprocess.run(
+        ["magick", "identify", *THREAD_LIMIT, "-format", "%w %h", str(path)],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    width, height = result.stdout.split()[:2]
+    return int(width), int(height)
+
+
+def run_compare(reference, candidate):
+    """Return (metric value, raw output) of `magick compare -metric SSIM`."""
+    with REPORT.span("compare"):
+        # compare exits with 1 when the images differ, so the status is not checked.
+        result = subprocess.run(
+            [
+                "magick", "compare", *THREAD_LIMIT,
+                "-metric", "SSIM", str(reference), str(candidate), "null:",
+            ],
+            capture_output=True,
+            text=True,
+        )
+    output = (result.stderr or result.stdout).strip()
+    # Newer ImageMagick 7 releases print "absolute (normalized)"; prefer the normalized value.
+    match = NORMALIZED_RE.search(output)
+    if match:
+        return float(match.group(1)), output
+    match = FLOAT_RE.search(output)
+    if not match:
+        raise RuntimeError(f"Could not read SSIM for {candidate}: {output}")
+    return float(match.group(0)), output
+
+
+def degrade(reference, out_path):
+    # An 8x8 thumbnail blown back up: structurally far from the original.
+    width, height = image_size(reference)
+    run_magick([str(reference), "-resize", "8x8!", "-resize", f"{width}x{height}!", str(out_path)])
+
+
+def detect_ssim_mode(reference):
+    """Work out whether this ImageMagick reports SSIM or 1 - SSIM for -metric SSIM.
+
+    The value for an image against itself must be 1 (similarity) or 0 (distortion),
+    and a heavily degraded copy must move away from it; anything else is rejected
+    rather than silently optimizing against a misread number.
+    """
+    with tempfile.TemporaryDirectory() as work_dir:
+        degraded = Path(work_dir) / "degraded.png"
+        degrade(reference, degraded)
+        same, same_output = run_compare(reference, reference)
+        worse, worse_output = run_compare(reference, degraded)
+    if abs(same - 1) < 0.01 and worse < same - 0.05:
+        return "similarity"
+    if abs(same) < 0.01 and worse > same + 0.05:
+        return "distortion"
+    raise RuntimeError(
+        "Unrecognised `magick compare -metric SSIM` output: "
+        f"identical -> {same_output!r}, degraded -> {worse_output!r}"
+    )
+
+
+def measure_ssim(reference, candidate, size, resized, mode):
+    with tempfile.TemporaryDirectory() as work_dir:
+        restored = candidate
+        if resized:
+            # Compare at the reference size so downscaled candidates are judged as displayed.
+            restored = Path(work_dir) / "restored.png"
+            run_magick([str(candidate), "-resize", f"{size[0]}x{size[1]}!", str(restored)])
+        value, _output = run_compare(reference, restored)
+    return value if mode == "similarity" else 1 - value
+
+
+def encode(reference, out_path, quality, width=None):
+    args = [str(reference)]
+    if width:
+        args += ["-resize", f"{width}x>"]
+    args += ["-quality", str(quality), str(out_path)]
+    run_magick(args)
+    return out_path.stat().st_size
+
+
+def search_quality(reference, size, width, args, mode, work_dir):
+    """Binary search the lowest quality whose SSIM meets the target; None if even max misses."""
+    best = None
+    low, high = args.min_quality, args.max_quality
+    while low <= high:
+        quality = (low + high) // 2
+        candidate = Path(work_dir) / f"q{quality}-w{width or size[0]}.webp"
+        nbytes = encode(reference, candidate, quality, width)
+        score = measure_ssim(reference, candidate, size, bool(width), mode)
+        if score >= args.target:
+            best = {"path": candidate, "bytes": nbytes, "quality": quality, "width": width, "ssim": score}
+            high = quality - 1
+        else:
+            low = quality + 1
+    return best
+
+
+def reference_for(image_path, item):
+    # Prefer the JPG kept by import-category-images.py: it never changes between runs.
+    jpg = image_path.with_suffix(".jpg")
+    if jpg.exists():
+        return jpg
+    if item.get("optimized"):
+        # The WebP is already a re-encode; measuring against it again would drift lower each run.
+        return None
+    return image_path
+
+
+def optimize_image(image_path, reference, args, mode, staged_path):
+    size = image_size(reference)
+    current_bytes = image_path.stat().st_size
+    widths = [None] + [width for width in args.widths if width < size[0]]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        best = None
+        for width in widths:
+            found = search_quality(reference, size, width, args, mode, work_dir)
+            if found and (best is None or found["bytes"] < best["bytes"]):
+                best = found
+        result = {"before": current_bytes, "after": current_bytes, "best": None, "staged": None}
+        if best is None or best["bytes"] >= current_bytes:
+            return result
+        shutil.copyfile(best["path"], staged_path)
+        result["best"] = {key: value for key, value in best.items() if key != "path"}
+        result["after"] = best["bytes"]
+        result["staged"] = staged_path
+        return result
+
+
+def try_optimize_image(image_path, reference, args, mode, staged_path):
+    try:
+        return optimize_image(image_path, reference, args, mode, staged_path)
+    except (subprocess.CalledProcessError, RuntimeError, OSError) as exc:
+        return {"error": str(exc)}
+
+
+def check(entries):
+    """Print the raw compare output for a few images so the parsing can be verified."""
+    for _category, item, path, reference in entries[:CHECK_IMAGES]:
+        with tempfile.TemporaryDirectory() as work_dir:
+            degraded = Path(work_dir) / "degraded.png"
+            encoded = Path(work_dir) / "q50.webp"
+            degrade(reference, degraded)
+            encode(reference, encoded, 50)
+            print(item["src"], "reference:", reference.name)
+            for label, candidate in (("identical", reference), ("quality 50", encoded), ("degraded", degraded)):
+                value, output = run_compare(reference, candidate)
+                print(f"  {label:<10} parsed {value:.4f}  raw: {output}")
+    print("Mode:", detect_ssim_mode(entries[0][3]))
+
+
+def load_entries(data):
+    entries = []
+    for category, items in data.items():
+        if not isinstance(items, list):
+            continue
+        for item in items:
+            if not isinstance(item, dict) or not item.get("src"):
+                continue
+            path = PUBLIC_ROOT / str(item["src"]).lstrip("/")
+            if not path.exists():
+                continue
+            reference = reference_for(path, item)
+            if reference is None:
+                REPORT.count_category(category, "images_skipped")
+                continue
+            entries.append((category, item, path, reference))
+    return entries
+
+
+def optimize(args):
+    ensure_magick()
+    data = json.loads(IMAGES_JSON_PATH.read_text(encoding="utf-8"))
+    entries = load_entries(data)
+    if not entries:
+        print("No images to optimize (already optimized ones are skipped unless their JPG exists).")
+        return
+    if args.check:
+        check(entries)
+        return
+
+    mode = detect_ssim_mode(entries[0][3])
+    workers = args.jobs or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as staging_dir:
+        # Workers only write to the staging directory; files and JSON are updated together below.
+        staged = [Path(staging_dir) / f"{index}.webp" for index in range(len(entries))]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(
+                pool.map(
+                    lambda pair: try_optimize_image(pair[0][2], pair[0][3], args, mode, pair[1]),
+                    zip(entries, staged),
+                )
+            )
+
+        total_before = 0
+        total_after = 0
+        failed = 0
+        try:
+            for (category, item, path, reference), result in zip(entries, results):
+                REPORT.count_category(category, "images")
+                if "error" in result:
+                    failed += 1
+                    REPORT.count_category(category, "images_failed")
+                    print(f"{item['src']}: failed ({result['error']})")
+                    item["bytes"] = path.stat().st_size
+                    continue
+                total_before += result["before"]
+                total_after += result["after"]
+                item["bytes"] = result["before"]
+                best = result["best"]
+                if not best:
+                    continue
+                REPORT.count_category(category, "images_optimized")
+                REPORT.count_category(category, "bytes_saved", result["before"] - result["after"])
+                width = f", width {best['width']}" if best["width"] else ""
+                print(
+                    f"{item['src']}: {result['before']} -> {result['after']} bytes "
+                    f"(quality {best['quality']}{width}, SSIM {best['ssim']:.4f})"
+                )
+                if args.dry_run:
+                    continue
+                shutil.copyfile(result["staged"], path)
+                item["bytes"] = result["after"]
+                item["optimized"] = {
+                    "quality": best["quality"],
+                    "width": best["width"],
+                    "ssim": round(best["ssim"], 4),
+                    "target": args.target,
+                    "reference": reference.suffix.lstrip("."),
+                }
+        finally:
+            if not args.dry_run:
+                with REPORT.span("write"):
+                    IMAGES_JSON_PATH.write_text(
+                        json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
+                    )
+                print("Saved", IMAGES_JSON_PATH)
+    print(f"Total: {total_before} -> {total_after} bytes")
+    if failed:
+        raise SystemExit(f"{failed} image(s) failed; their files were left unchanged.")
+
+
+def parse_widths(value):
+    return sorted({int(part) for part in value.split(",") if part.strip()}, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-encode category images at the lowest quality that keeps a target SSIM."
+    )
+    parser.add_argument("--target", type=float, default=0.97, help="Minimum SSIM (0-1).")
+    parser.add_argument("--min-quality", type=int, default=30)
+    parser.add_argument("--max-quality", type=int, default=85)
+    parser.add_argument(
+        "--widths",
+        type=parse_widths,
+        default=[],
+        help="Comma-separated smaller widths to try as well (e.g. 1000,800).",
+    )
+    parser.add_argument("--jobs", type=int, default=0, help="Parallel images (default: CPU count).")
+    parser.add_argument("--dry-run", action="store_true", help="Report savings without writing files.")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help=f"Print raw compare output for {CHECK_IMAGES} images and the detected SSIM mode, then exit.",
+    )
+    add_report_args(parser)
+    args = parser.parse_args()
+    run_with_report(REPORT, args, lambda: optimize(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import codecs
+import re
+
+
+STREAM_CHUNK_SIZE = 16 * 1024
+LITERAL_PREFIX_RE = re.compile(r"[^\\.^$*+?{}\[\]|()]*")
+
+
+def read_until(resp, until, report, host, chunk_size=STREAM_CHUNK_SIZE):
+    """Read resp until the regex `until` matches; returns (bytes received, decoded text).
+
+    Every match starts with the pattern's literal prefix (e.g. "<table"), so after
+    each chunk the search resumes from the last place that prefix appeared instead
+    of rescanning the whole page.
+    """
+    prefix = LITERAL_PREFIX_RE.match(until.pattern).group(0)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    received = 0
+    resume = 0
+    text = ""
+    while True:
+        chunk = resp.read(chunk_size)
+        if not chunk:
+            with report.span("decode"):
+                text += decoder.decode(b"", final=True)
+            break
+        received += len(chunk)
+        with report.span("decode"):
+            text += decoder.decode(chunk)
+        if until.search(text, resume):
+            report.count_host(host, "early_exits")
+            break
+        if prefix:
+            last = text.rfind(prefix, resume)
+            # Keep an overlap so a prefix split across chunks is still found.
+            resume = last if last >= 0 else max(resume, len(text) - len(prefix) + 1)
+    return received, text
@@ -0,0 +1,128 @@
+import cProfile
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+class RunReport:
+    """Collect span timings and per-host / per-category counters for a script run."""
+
+    def __init__(self, script):
+        self.script = script
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.spans = {}
+        self.hosts = {}
+        self.categories = {}
+        self.empty_parses = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, category=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                entry = self.spans.get(name)
+                if entry is None:
+                    entry = self.spans[name] = {"count": 0, "total_s": 0.0, "max_s": 0.0}
+                entry["count"] += 1
+                entry["total_s"] += elapsed
+                if elapsed > entry["max_s"]:
+                    entry["max_s"] = elapsed
+            if category:
+                self.count_category(category, f"{name}_s", elapsed)
+
+    def count_host(self, host, key, value=1):
+        with self.lock:
+            counters = self.hosts.setdefault(host, {})
+            counters[key] = counters.get(key, 0) + value
+
+    def count_category(self, category, key, value=1):
+        with self.lock:
+            counters = self.categories.setdefault(category, {})
+            counters[key] = counters.get(key, 0) + value
+
+    def record_parse(self, category, url, rows):
+        self.count_category(category, "pages_parsed")
+        self.count_category(category, "rows_parsed", rows)
+        if rows == 0:
+            self.count_category(category, "empty_parses")
+            with self.lock:
+                self.empty_parses.append({"category": category, "url": url})
+
+    def merge(self, other):
+        """Fold in the spans and counters of another report's to_dict() (e.g. from a worker)."""
+        with self.lock:
+            for name, span in other.get("spans", {}).items():
+                entry = self.spans.get(name)
+                if entry is None:
+                    entry = self.spans[name] = {"count": 0, "total_s": 0.0, "max_s": 0.0}
+                entry["count"] += span["count"]
+                entry["total_s"] += span["total_s"]
+                entry["max_s"] = max(entry["max_s"], span["max_s"])
+            self.empty_parses.extend(other.get("empty_parses", []))
+        for host, counters in other.get("hosts", {}).items():
+            for key, value in counters.items():
+                self.count_host(host, key, value)
+        for category, counters in other.get("categories", {}).items():
+            for key, value in counters.items():
+                self.count_category(category, key, value)
+
+    def to_dict(self):
+        spans = {
+            name: {
+                "count": entry["count"],
+                "total_s": round(entry["total_s"], 6),
+                "max_s": round(entry["max_s"], 6),
+            }
+            for name, entry in sorted(self.spans.items())
+        }
+        return {
+            "script": self.script,
+            "started_at": self.started_at.isoformat(),
+            "duration_s": round(time.perf_counter() - self.started, 6),
+            "spans": spans,
+            "hosts": dict(sorted(self.hosts.items())),
+            "categories": {
+                category: {
+                    key: round(value, 6) if isinstance(value, float) else value
+                    for key, value in counters.items()
+                }
+                for category, counters in sorted(self.categories.items())
+            },
+            "empty_parses": self.empty_parses,
+        }
+
+    def write(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print("Saved run report", path)
+
+
+def add_report_args(parser):
+    parser.add_argument("--report", help="Write a JSON run report to this path.")
+    parser.add_argument("--profile", help="Write cProfile stats to this path.")
+
+
+def run_with_report(report, args, func):
+    profiler = cProfile.Profile() if args.profile else None
+    try:
+        if profiler:
+            profiler.runcall(func)
+        else:
+            func()
+    finally:
+        if profiler:
+            profiler.dump_stats(args.profile)
+            print("Saved profile", args.profile)
+        if args.report:
+            report.write(args.report)